@@ -0,0 +1,45 @@
+import argparse
+import contextlib
+import os
+import sys
+import time
+from soccer_env import ReplayBuffer, SoccerEnv
+
+# Headless step throughput of SoccerEnv: random actions, no window. Goal prints from step() go to
+# /dev/null so the numbers measure the simulation, not the terminal.
+# Random players practically never score, so play_game() would not return; the recorded benchmark does the
+# same per-frame work (record_step + step) and cuts episodes at a fixed length instead.
+
+def step_throughput(num_steps):
+    env = SoccerEnv()
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        if env.step(env.random_actions()):
+            env.reset_game()
+    return num_steps / (time.perf_counter() - start)
+
+def recorded_throughput(num_steps, episode_length):
+    env = SoccerEnv()
+    buffer = ReplayBuffer(capacity=num_steps)
+    start = time.perf_counter()
+    for i in range(num_steps):
+        actions = env.random_actions()
+        env.record_step(actions)
+        if env.step(actions) or (i + 1) % episode_length == 0:
+            env.record_to_buffer(buffer)
+            env.reset_game()
+    return num_steps / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=100000)
+    parser.add_argument("--episode-length", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        steps_per_second = step_throughput(args.steps)
+        recorded_per_second = recorded_throughput(args.steps, args.episode_length)
+
+    print(f"pygame loaded: {'pygame' in sys.modules}")
+    print(f"step():                {steps_per_second:,.0f} steps/s")
+    print(f"record_step + step():  {recorded_per_second:,.0f} steps/s")
@@ -1,7 +1,9 @@
-import pygame
 import numpy as np
 import random
 
+# Game rules only; drawing lives in soccer_render.py and pygame is imported the first time something is
+# drawn, so SoccerEnv runs headless (no pygame, no display) unless rendering is asked for.
+
 class ReplayBuffer:
     def __init__(self, capacity):
         self.capacity = capacity
@@ -22,9 +24,7 @@ class ReplayBuffer:
         return len(self.buffer)
 
 class SoccerEnv:
-    def __init__(self):
-        pygame.init()
-
+    def __init__(self, render=False):
         # Setting parameters
         self.GRID_WIDTH = 9
         self.GRID_HEIGHT = 7
@@ -32,14 +32,24 @@ class SoccerEnv:
         self.SCREEN_WIDTH = self.GRID_WIDTH * self.CELL_SIZE
         self.SCREEN_HEIGHT = self.GRID_HEIGHT * self.CELL_SIZE
 
-        self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
-        pygame.display.set_caption('Pygame Soccer-like Game')
-
         self.net_height = 3 * self.CELL_SIZE
         self.net_top_position = (self.SCREEN_HEIGHT - self.net_height) // 2
 
+        self.renderer = None
+        if render:
+            self.open_renderer()
+
         self.reset_game()
 
+    def open_renderer(self):
+        if self.renderer is None:
+            from soccer_render import SoccerRenderer
+            self.renderer = SoccerRenderer(self)
+        return self.renderer
+
+    def render(self):
+        self.open_renderer().draw(self)
+
     def reset_game(self):
         self.ball_pos_x, self.ball_pos_y = self.GRID_WIDTH // 2 * self.CELL_SIZE, self.GRID_HEIGHT // 2 * self.CELL_SIZE
         self.ball_target_x = self.ball_pos_x
@@ -147,7 +157,8 @@ class SoccerEnv:
                 actions = get_actions_fn(self)
                 self.record_step(actions)
                 goal_scored = self.step(actions)
-                #self.render()
+                if self.renderer is not None:  # Only drawn when the env was created with render=True
+                    self.render()
                 
                 if goal_scored:
                     print("End of this game")
@@ -161,38 +172,12 @@ class SoccerEnv:
 
 
 
-    def render(self):
-        self.screen.fill((255, 255, 255))
-        for x in range(0, self.SCREEN_WIDTH, self.CELL_SIZE):
-            for y in range(0, self.SCREEN_HEIGHT, self.CELL_SIZE):
-                pygame.draw.rect(self.screen, (200, 200, 200), (x, y, self.CELL_SIZE, self.CELL_SIZE), 1)
-
-        player_colors = {
-            'A1': (0, 0, 255), 'A2': (135, 206, 235),
-            'B1': (0, 128, 0), 'B2': (50, 205, 50)
-        }
-
-        for player, pos in self.player_positions.items():
-            x, y = pos
-            pygame.draw.circle(self.screen, player_colors[player], (x*self.CELL_SIZE + self.CELL_SIZE//2, y*self.CELL_SIZE + self.CELL_SIZE//2), self.CELL_SIZE//3)
-
-        if self.ball_possession:
-            ball_x, ball_y = self.player_positions[self.ball_possession]
-            pygame.draw.circle(self.screen, (255, 0, 0), (ball_x*self.CELL_SIZE + self.CELL_SIZE//2, ball_y*self.CELL_SIZE + self.CELL_SIZE//2), self.CELL_SIZE//4)
-        else:
-            pygame.draw.circle(self.screen, (255, 0, 0), (int(self.ball_pos_x), int(self.ball_pos_y)), self.CELL_SIZE//4)
-
-        pygame.draw.rect(self.screen, (150, 150, 150), (0, self.net_top_position, self.CELL_SIZE, self.net_height))
-        pygame.draw.rect(self.screen, (150, 150, 150), (self.SCREEN_WIDTH - self.CELL_SIZE, self.net_top_position, self.CELL_SIZE, self.net_height))
-
-        pygame.display.flip()
-
     def run(self, buffer, get_actions_fn=None):
+        # Interactive loop in a window
+        renderer = self.open_renderer()
         running = True
         while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
+            running = renderer.handle_events()
 
             if get_actions_fn:
                 actions = get_actions_fn(self)
@@ -202,12 +187,13 @@ class SoccerEnv:
             self.record_step(actions)
             self.step(actions)
             self.render()
-            pygame.time.wait(50)
+            renderer.wait(50)
             if self.check_goal():
                 self.reset_game()
             self.record_to_buffer(buffer)
 
-        pygame.quit()
+        renderer.close()
+        self.renderer = None
 
     def random_actions(self):
         action_choices = ['MOVE_LEFT', 'MOVE_RIGHT', 'MOVE_UP', 'MOVE_DOWN', 'PICK', 'SHOOT_UP', 'SHOOT_DOWN', 'SHOOT_LEFT', 'SHOOT_RIGHT']
@@ -0,0 +1,49 @@
+import pygame
+
+# Optional pygame view of a SoccerEnv. Only imported when a game is drawn, so the simulation runs
+# without pygame (or a display) for data generation.
+
+class SoccerRenderer:
+    def __init__(self, env):
+        pygame.init()
+        self.screen = pygame.display.set_mode((env.SCREEN_WIDTH, env.SCREEN_HEIGHT))
+        pygame.display.set_caption('Pygame Soccer-like Game')
+
+    def draw(self, env):
+        self.screen.fill((255, 255, 255))
+        for x in range(0, env.SCREEN_WIDTH, env.CELL_SIZE):
+            for y in range(0, env.SCREEN_HEIGHT, env.CELL_SIZE):
+                pygame.draw.rect(self.screen, (200, 200, 200), (x, y, env.CELL_SIZE, env.CELL_SIZE), 1)
+
+        player_colors = {
+            'A1': (0, 0, 255), 'A2': (135, 206, 235),
+            'B1': (0, 128, 0), 'B2': (50, 205, 50)
+        }
+
+        for player, pos in env.player_positions.items():
+            x, y = pos
+            pygame.draw.circle(self.screen, player_colors[player], (x*env.CELL_SIZE + env.CELL_SIZE//2, y*env.CELL_SIZE + env.CELL_SIZE//2), env.CELL_SIZE//3)
+
+        if env.ball_possession:
+            ball_x, ball_y = env.player_positions[env.ball_possession]
+            pygame.draw.circle(self.screen, (255, 0, 0), (ball_x*env.CELL_SIZE + env.CELL_SIZE//2, ball_y*env.CELL_SIZE + env.CELL_SIZE//2), env.CELL_SIZE//4)
+        else:
+            pygame.draw.circle(self.screen, (255, 0, 0), (int(env.ball_pos_x), int(env.ball_pos_y)), env.CELL_SIZE//4)
+
+        pygame.draw.rect(self.screen, (150, 150, 150), (0, env.net_top_position, env.CELL_SIZE, env.net_height))
+        pygame.draw.rect(self.screen, (150, 150, 150), (env.SCREEN_WIDTH - env.CELL_SIZE, env.net_top_position, env.CELL_SIZE, env.net_height))
+
+        pygame.display.flip()
+
+    def handle_events(self):
+        # False once the window was closed
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+        return True
+
+    def wait(self, milliseconds):
+        pygame.time.wait(milliseconds)
+
+    def close(self):
+        pygame.quit()
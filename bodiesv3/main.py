@@ -436,7 +436,7 @@ ball_model = BallTransformerSeq()
 ball_model.load_state_dict(torch.load('model_ball.pth'))
 ball_model.eval()
 
-env = SoccerEnv()
+env = SoccerEnv()  # SoccerEnv(render=True) to watch the games
 state = env.state
 initial_matrix = supplementary.state_to_matrix(state)
 print("Initial state:")
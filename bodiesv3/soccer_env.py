@@ -1,11 +1,11 @@
-import pygame
 import random
 from copy import deepcopy
 
-class SoccerEnv:
-    def __init__(self):
-        pygame.init()
+# Game rules only; drawing lives in soccer_render.py and pygame is imported the first time something is
+# drawn, so self-play runs headless (no pygame, no display) unless rendering is asked for.
 
+class SoccerEnv:
+    def __init__(self, render=False):
         # Setting parameters
         self.GRID_WIDTH = 9
         self.GRID_HEIGHT = 7
@@ -13,13 +13,14 @@ class SoccerEnv:
         self.SCREEN_WIDTH = self.GRID_WIDTH * self.CELL_SIZE
         self.SCREEN_HEIGHT = self.GRID_HEIGHT * self.CELL_SIZE
 
-        self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
-        pygame.display.set_caption('Pygame Soccer-like Game')
-
         self.net_height = 3
         self.net_width = 1  # New width for the goal post
         self.net_top_position = (self.GRID_HEIGHT - self.net_height) // 2
 
+        self.renderer = None
+        if render:
+            self.open_renderer()
+
         self.reset_game()
     
     def reset_game(self):
@@ -61,31 +62,23 @@ class SoccerEnv:
         return None
 
 
-    def render(self, state):
-        self.screen.fill((255, 255, 255))
-        for x in range(0, self.SCREEN_WIDTH, self.CELL_SIZE):
-            for y in range(0, self.SCREEN_HEIGHT, self.CELL_SIZE):
-                pygame.draw.rect(self.screen, (200, 200, 200), (x, y, self.CELL_SIZE, self.CELL_SIZE), 1)
-        
-        pygame.draw.rect(self.screen, (150, 150, 150), (0, self.net_top_position * self.CELL_SIZE, self.net_width * self.CELL_SIZE, self.net_height * self.CELL_SIZE))
-        pygame.draw.rect(self.screen, (150, 150, 150), (self.SCREEN_WIDTH - self.net_width * self.CELL_SIZE, self.net_top_position * self.CELL_SIZE, self.net_width * self.CELL_SIZE, self.net_height * self.CELL_SIZE))
-
-        player_colors = {
-            'A1': (0, 0, 255), 'A2': (135, 206, 235),
-            'B1': (0, 128, 0), 'B2': (50, 205, 50)
-        }
+    def open_renderer(self):
+        if self.renderer is None:
+            from soccer_render import SoccerRenderer
+            self.renderer = SoccerRenderer(self)
+        return self.renderer
 
+    def update_possession(self, state):
+        # A player standing on the ball takes it. This used to happen inside render(), it is a game rule
+        # and has to run headless too.
         for player, pos in state['player_positions'].items():
             x, y = pos
-            pygame.draw.circle(self.screen, player_colors[player], (x*self.CELL_SIZE + self.CELL_SIZE//2, y*self.CELL_SIZE + self.CELL_SIZE//2), self.CELL_SIZE//3)
-            
             if [state['ball_pos'][0], state['ball_pos'][1]] == [x, y]:
                 state['ball_possession'] = player
-        
-        ball_x, ball_y = state['ball_pos']
-        pygame.draw.circle(self.screen, (255, 0, 0), (ball_x * self.CELL_SIZE + self.CELL_SIZE // 2, ball_y * self.CELL_SIZE + self.CELL_SIZE // 2), self.CELL_SIZE // 4)
+        return state
 
-        pygame.display.flip()
+    def render(self, state):
+        self.open_renderer().draw(state)
         return state
 
     def play_game(self, action_fn, buffer, n_game, num_games=1):
@@ -104,12 +97,13 @@ class SoccerEnv:
             prev_ball_possession = self.ball_possession  # To keep track of the previous ball possession
 
             while True:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        pygame.quit()
+                state = self.update_possession(deepcopy(state))
+                if self.renderer is not None:
+                    if not self.renderer.handle_events():
+                        self.renderer.close()
+                        self.renderer = None
                         return
-
-                state = self.render(deepcopy(state))
+                    self.render(state)
                 game_frames.append(deepcopy(state))  # Save the current frame
 
                 # Store player positions in player_positions list
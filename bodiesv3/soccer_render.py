@@ -0,0 +1,45 @@
+import pygame
+
+# Optional pygame view of a SoccerEnv state. Only imported when a game is drawn, so self-play runs
+# without pygame (or a display).
+
+class SoccerRenderer:
+    def __init__(self, env):
+        pygame.init()
+        self.env = env
+        self.screen = pygame.display.set_mode((env.SCREEN_WIDTH, env.SCREEN_HEIGHT))
+        pygame.display.set_caption('Pygame Soccer-like Game')
+
+    def draw(self, state):
+        env = self.env
+        self.screen.fill((255, 255, 255))
+        for x in range(0, env.SCREEN_WIDTH, env.CELL_SIZE):
+            for y in range(0, env.SCREEN_HEIGHT, env.CELL_SIZE):
+                pygame.draw.rect(self.screen, (200, 200, 200), (x, y, env.CELL_SIZE, env.CELL_SIZE), 1)
+
+        pygame.draw.rect(self.screen, (150, 150, 150), (0, env.net_top_position * env.CELL_SIZE, env.net_width * env.CELL_SIZE, env.net_height * env.CELL_SIZE))
+        pygame.draw.rect(self.screen, (150, 150, 150), (env.SCREEN_WIDTH - env.net_width * env.CELL_SIZE, env.net_top_position * env.CELL_SIZE, env.net_width * env.CELL_SIZE, env.net_height * env.CELL_SIZE))
+
+        player_colors = {
+            'A1': (0, 0, 255), 'A2': (135, 206, 235),
+            'B1': (0, 128, 0), 'B2': (50, 205, 50)
+        }
+
+        for player, pos in state['player_positions'].items():
+            x, y = pos
+            pygame.draw.circle(self.screen, player_colors[player], (x*env.CELL_SIZE + env.CELL_SIZE//2, y*env.CELL_SIZE + env.CELL_SIZE//2), env.CELL_SIZE//3)
+
+        ball_x, ball_y = state['ball_pos']
+        pygame.draw.circle(self.screen, (255, 0, 0), (ball_x * env.CELL_SIZE + env.CELL_SIZE // 2, ball_y * env.CELL_SIZE + env.CELL_SIZE // 2), env.CELL_SIZE // 4)
+
+        pygame.display.flip()
+
+    def handle_events(self):
+        # False once the window was closed
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+        return True
+
+    def close(self):
+        pygame.quit()
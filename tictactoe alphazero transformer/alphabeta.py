@@ -0,0 +1,202 @@
+import argparse
+import random
+import time
+import numpy as np
+from constants import DIMENSION
+from mcts_code import Board
+
+# Classical baseline: negamax with alpha-beta pruning, iterative deepening, move ordering (transposition
+# table move, then history heuristic, then centre distance) and a Zobrist-hashed transposition table.
+# Rules are Board's: a full row, column or diagonal of DIMENSION wins. Terminal positions at the root go
+# through Board; inside the search only the lines through the last move are checked. Proven results score
+# +-WIN, so a full-depth search gives exact values on boards small enough to search completely.
+
+board = Board()
+CELLS = DIMENSION * DIMENSION
+WIN = 1000
+EXACT, LOWER, UPPER = 0, 1, 2
+
+def winning_lines():
+    lines = [[row * DIMENSION + column for column in range(DIMENSION)] for row in range(DIMENSION)]
+    lines += [[row * DIMENSION + column for row in range(DIMENSION)] for column in range(DIMENSION)]
+    lines.append([index * DIMENSION + index for index in range(DIMENSION)])
+    lines.append([index * DIMENSION + DIMENSION - 1 - index for index in range(DIMENSION)])
+    return lines
+
+LINES = winning_lines()
+LINES_THROUGH = [[line for line in LINES if cell in line] for cell in range(CELLS)]
+CENTRE = (DIMENSION - 1) / 2
+CENTRE_DISTANCE = [abs(cell // DIMENSION - CENTRE) + abs(cell % DIMENSION - CENTRE) for cell in range(CELLS)]
+
+class SearchTimeout(Exception):
+    pass
+
+class AlphaBetaEngine:
+    def __init__(self, max_depth=None, time_limit=None, max_table_entries=1000000, seed=0):
+        self.max_depth = max_depth  # None searches to the end of the game
+        self.time_limit = time_limit  # Seconds per move; the last finished iteration is used when it runs out
+        self.max_table_entries = max_table_entries
+        generator = random.Random(seed)
+        self.keys = [[0] + [generator.getrandbits(64) for _ in range(2)] for _ in range(CELLS)]
+        self.side_key = generator.getrandbits(64)
+        self.table = {}
+        self.history = [0] * CELLS
+
+        self.nodes = 0
+        self.table_hits = 0
+        self.seconds = 0.0
+        self.moves = 0
+        self.last_depth = 0
+
+    def nodes_per_second(self):
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    def search(self, state, player):
+        # Returns (move, value for player, completed depth); value is +-WIN for proven results
+        self.cells = [int(cell) for cell in np.asarray(state).flatten()]
+        self.hash = 0
+        for cell, occupant in enumerate(self.cells):
+            self.hash ^= self.keys[cell][occupant]
+        if board.who_wins(state) != 2:
+            return None, WIN * board.outcome_for(state, player), 0
+
+        empty = self.cells.count(0)
+        max_depth = empty if self.max_depth is None else min(self.max_depth, empty)
+        if len(self.table) > self.max_table_entries:
+            self.table.clear()
+        self.deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+
+        start = time.perf_counter()
+        best_move, best_value = None, 0
+        try:
+            for depth in range(1, max_depth + 1):
+                best_value = self.negamax(depth, -WIN - 1, WIN + 1, player)
+                best_move = self.table[self.key(player)][3]
+                self.last_depth = depth
+                if abs(best_value) == WIN:
+                    break  # Proven, deeper iterations can't change the result
+        except SearchTimeout:
+            self.cells = [int(cell) for cell in np.asarray(state).flatten()]
+            if best_move is None:  # Not even depth 1 finished, fall back to the ordering's first choice
+                best_move = self.ordered_moves(None)[0]
+        self.seconds += time.perf_counter() - start
+        self.moves += 1
+        return (best_move // DIMENSION, best_move % DIMENSION), best_value, self.last_depth
+
+    def key(self, player):
+        return self.hash ^ self.side_key if player == 2 else self.hash
+
+    def ordered_moves(self, table_move):
+        moves = [cell for cell in range(CELLS) if self.cells[cell] == 0]
+        moves.sort(key=lambda cell: (cell != table_move, -self.history[cell], CENTRE_DISTANCE[cell]))
+        return moves
+
+    def wins(self, cell, player):
+        return any(all(self.cells[index] == player for index in line) for line in LINES_THROUGH[cell])
+
+    def evaluate(self, player):
+        # Open lines weighted by how far each side has filled them, from player's point of view
+        score = 0
+        for line in LINES:
+            mine = sum(1 for index in line if self.cells[index] == player)
+            theirs = sum(1 for index in line if self.cells[index] == 3 - player)
+            if theirs == 0:
+                score += mine * mine
+            elif mine == 0:
+                score -= theirs * theirs
+        return max(-WIN + 1, min(WIN - 1, score))
+
+    def negamax(self, depth, alpha, beta, player):
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % 1024 == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        key = self.key(player)
+        entry = self.table.get(key)
+        table_move = None
+        if entry is not None:
+            entry_depth, entry_value, flag, table_move = entry
+            if entry_depth >= depth or (flag == EXACT and abs(entry_value) == WIN):  # Proven values hold at any depth
+                self.table_hits += 1
+                if flag == EXACT:
+                    return entry_value
+                if flag == LOWER:
+                    alpha = max(alpha, entry_value)
+                else:
+                    beta = min(beta, entry_value)
+                if alpha >= beta:
+                    return entry_value
+
+        moves = self.ordered_moves(table_move)
+        if not moves:
+            return 0  # Full board without a line, draw
+        if depth == 0:
+            return self.evaluate(player)
+
+        alpha_original = alpha
+        best_value, best_move = -WIN - 1, moves[0]
+        for cell in moves:
+            self.cells[cell] = player
+            self.hash ^= self.keys[cell][player]
+            if self.wins(cell, player):
+                value = WIN
+            else:
+                value = -self.negamax(depth - 1, -beta, -alpha, 3 - player)
+            self.cells[cell] = 0
+            self.hash ^= self.keys[cell][player]
+
+            if value > best_value:
+                best_value, best_move = value, cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                self.history[cell] += depth * depth
+                break
+
+        if best_value <= alpha_original:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (depth, best_value, flag, best_move)
+        return best_value
+
+def exact_value(state, player, engine=None):
+    # Game-theoretic value for the player to move: 1 win, 0 draw, -1 loss (full-depth search)
+    engine = engine or AlphaBetaEngine()
+    saved = engine.max_depth, engine.time_limit
+    engine.max_depth, engine.time_limit = None, None
+    _, value, _ = engine.search(state, player)
+    engine.max_depth, engine.time_limit = saved
+    return int(np.sign(value)) if abs(value) == WIN else 0
+
+class AlphaBetaAgent:
+    # Arena agent playing the engine's best move
+    def __init__(self, engine):
+        self.engine = engine
+
+    def __call__(self, state, player):
+        move, _, _ = self.engine.search(state, player)
+        return move
+
+if __name__ == "__main__":
+    from arena import MCTSAgent, OPPONENTS, make_mcts, play_match
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=None)
+    parser.add_argument("--time-limit", type=float, default=None)
+    parser.add_argument("--search-length", type=int, default=100)
+    args = parser.parse_args()
+
+    engine = AlphaBetaEngine(max_depth=args.depth, time_limit=args.time_limit)
+    agent = AlphaBetaAgent(engine)
+    mcts_agent = MCTSAgent(make_mcts(args.search_length))
+    for name, opponent in [("random", OPPONENTS["random"]), ("solver", OPPONENTS["solver"]), (f"mcts-{args.search_length}", mcts_agent)]:
+        results = play_match(agent, opponent, args.games)
+        print(f"alphabeta vs {name:<10} score={results['score']:.2f} W/D/L={results['wins']}/{results['draws']}/{results['losses']}")
+    print(f"alphabeta: {engine.nodes} nodes in {engine.seconds:.2f}s, {engine.nodes_per_second():.0f} nodes/s, "
+          f"{engine.seconds / max(engine.moves, 1) * 1000:.2f} ms/move, table hits {engine.table_hits}")
+    if mcts_agent.moves:
+        print(f"mcts-{args.search_length}: {mcts_agent.simulations / max(mcts_agent.seconds, 1e-9):.0f} simulations/s, "
+              f"{mcts_agent.seconds / mcts_agent.moves * 1000:.2f} ms/move")
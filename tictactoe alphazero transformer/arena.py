@@ -0,0 +1,94 @@
+from constants import DIMENSION
+import time
+import numpy as np
+import torch
+from model import TicTacToeTransformerSeq
+from mcts_code import MCTS, Board, random_agent
+from solver import solver_agent
+
+board = Board()
+
+# Headless games between agents. An agent is any callable agent(state, player) -> (row, column).
+
+def random_opponent(state, player):
+    return random_agent(state)
+
+def make_mcts(search_length, model_weights=None, value_weights=None, **options):
+    # Fresh MCTS on a TicTacToeTransformerSeq, optionally loading saved state dicts; options set MCTS attributes
+    model = TicTacToeTransformerSeq()
+    if model_weights:
+        model.load_state_dict(torch.load(model_weights))
+    mcts = MCTS(model)
+    if value_weights:
+        mcts.value_net.load_state_dict(torch.load(value_weights))
+    mcts.search_length = search_length
+    for name, value in options.items():
+        setattr(mcts, name, value)
+    return mcts
+
+class MCTSAgent:
+    def __init__(self, mcts):
+        self.mcts = mcts
+        self.simulations = 0
+        self.moves = 0
+        self.seconds = 0.0
+        self.cpu_seconds = 0.0
+
+    def __call__(self, state, player):
+        start, cpu_start = time.perf_counter(), time.process_time()
+        best_child = self.mcts.search(state.copy(), player)
+        self.seconds += time.perf_counter() - start
+        self.cpu_seconds += time.process_time() - cpu_start
+        self.simulations += self.mcts.last_search_simulations
+        self.moves += 1
+        return best_child.move
+
+OPPONENTS = {
+    "random": random_opponent,
+    "solver": solver_agent,
+}
+
+def alphabeta_opponent():
+    from alphabeta import AlphaBetaAgent, AlphaBetaEngine
+    return AlphaBetaAgent(AlphaBetaEngine())
+
+# Opponents only played when asked for by name (get_opponent). OPPONENTS is the default evaluation set that
+# sweep.py and the benchmarks iterate, it stays fixed so their scores remain comparable with earlier runs.
+OPTIONAL_OPPONENTS = {
+    "alphabeta": alphabeta_opponent,
+}
+
+def get_opponent(name):
+    if name in OPPONENTS:
+        return OPPONENTS[name]
+    return OPTIONAL_OPPONENTS[name]()
+
+def play_arena_game(agent_1, agent_2):
+    # Returns the winning player (1 or 2), or 0 for a draw
+    state = np.zeros((DIMENSION, DIMENSION))
+    agents = {1: agent_1, 2: agent_2}
+    player = 1
+    while board.who_wins(state) == 2:
+        move = agents[player](state, player)
+        state[move[0]][move[1]] = player
+        player = 3 - player
+    return board.who_actually_wins(state)
+
+def play_match(agent, opponent, num_games):
+    # Alternates who moves first; score counts a win as 1 and a draw as 0.5
+    results = {"wins": 0, "draws": 0, "losses": 0}
+    for game in range(num_games):
+        agent_player = 1 if game % 2 == 0 else 2
+        if agent_player == 1:
+            winner = play_arena_game(agent, opponent)
+        else:
+            winner = play_arena_game(opponent, agent)
+
+        if winner == 0:
+            results["draws"] += 1
+        elif winner == agent_player:
+            results["wins"] += 1
+        else:
+            results["losses"] += 1
+    results["score"] = (results["wins"] + 0.5 * results["draws"]) / max(num_games, 1)
+    return results
@@ -0,0 +1,59 @@
+import queue
+import random
+import threading
+import numpy as np
+import torch
+
+# Background batch preparation for train_model. The training set is packed once into contiguous arrays;
+# a worker thread then draws the batches (sampling without replacement inside a batch, like random.sample),
+# gathers them with one fancy-index per array and queues ready tensors, pinned when CUDA is available,
+# up to `prefetch` batches ahead of the optimizer.
+
+class PrefetchSampler:
+    def __init__(self, arrays, batch_size, num_batches, prefetch=4, seed=None):
+        self.arrays = [np.ascontiguousarray(array) for array in arrays]
+        self.size = len(self.arrays[0])
+        self.batch_size = min(batch_size, self.size)
+        self.num_batches = num_batches
+        self.pin_memory = torch.cuda.is_available()
+        self.rng = np.random.default_rng(random.getrandbits(32) if seed is None else seed)
+
+        self.batches = queue.Queue(maxsize=prefetch)
+        self.stopping = threading.Event()
+        self.worker = threading.Thread(target=self.fill, daemon=True)
+        self.worker.start()
+
+    def fill(self):
+        try:
+            for _ in range(self.num_batches):
+                indices = self.rng.choice(self.size, self.batch_size, replace=False)
+                batch = [torch.from_numpy(array[indices]) for array in self.arrays]
+                if self.pin_memory:
+                    batch = [tensor.pin_memory() for tensor in batch]
+                if not self.put(batch):
+                    return
+        except Exception as error:  # Handed to the training thread, which re-raises it
+            self.put(error)
+
+    def put(self, item):
+        while not self.stopping.is_set():
+            try:
+                self.batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self):
+        try:
+            for _ in range(self.num_batches):
+                batch = self.batches.get()
+                if isinstance(batch, Exception):
+                    raise batch
+                yield batch
+        finally:
+            self.close()
+
+    def close(self):
+        self.stopping.set()
+        self.worker.join()
@@ -0,0 +1,31 @@
+import argparse
+from arena import MCTSAgent, OPPONENTS, OPTIONAL_OPPONENTS, get_opponent, make_mcts, play_match
+
+# Strength at small simulation budgets: Gumbel root with sequential halving at 8-16 simulations
+# against the PUCT root at the same budgets and at the default 100.
+# Score counts a win as 1 and a draw as 0.5, so 0.5 against the exact solver is perfect play.
+
+CONFIGURATIONS = [("puct", 8), ("puct", 16), ("puct", 100), ("gumbel", 8), ("gumbel", 16)]
+
+def run_configuration(opponent_name, root_selection, search_length, num_games, model_weights=None, value_weights=None):
+    agent = MCTSAgent(make_mcts(search_length, model_weights, value_weights, root_selection=root_selection))
+    results = play_match(agent, get_opponent(opponent_name), num_games)
+    results["simulations_per_move"] = agent.simulations / max(agent.moves, 1)
+    results["seconds_per_move"] = agent.seconds / max(agent.moves, 1)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--opponents", nargs="+", default=["random", "solver"], choices=sorted(OPPONENTS) + sorted(OPTIONAL_OPPONENTS))
+    parser.add_argument("--model-weights", default=None)
+    parser.add_argument("--value-weights", default=None)
+    args = parser.parse_args()
+
+    for opponent_name in args.opponents:
+        print(f"vs {opponent_name}:")
+        for root_selection, search_length in CONFIGURATIONS:
+            results = run_configuration(opponent_name, root_selection, search_length, args.games, args.model_weights, args.value_weights)
+            print(f"  {root_selection:<6} search_length={search_length:>3} score={results['score']:.2f} "
+                  f"W/D/L={results['wins']}/{results['draws']}/{results['losses']} "
+                  f"sims/move={results['simulations_per_move']:.1f} ms/move={1000 * results['seconds_per_move']:.1f}")
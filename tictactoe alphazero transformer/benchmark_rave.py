@@ -0,0 +1,40 @@
+import argparse
+from arena import MCTSAgent, OPPONENTS, make_mcts, play_match
+
+# Simulations per move needed to reach a target score, plain UCB/PUCT vs. RAVE-blended selection.
+# Score counts a win as 1 and a draw as 0.5, so 0.5 against the exact solver is perfect play.
+
+SIMULATION_COUNTS = [4, 8, 16, 32, 64, 100]
+TARGET_SCORES = {"random": 0.9, "solver": 0.5}
+
+def simulations_to_target(opponent_name, use_rave, num_games, model_weights=None, value_weights=None):
+    rows = []
+    for search_length in SIMULATION_COUNTS:
+        agent = MCTSAgent(make_mcts(search_length, model_weights, value_weights, use_rave=use_rave))
+        results = play_match(agent, OPPONENTS[opponent_name], num_games)
+        results["search_length"] = search_length
+        results["simulations_per_move"] = agent.simulations / max(agent.moves, 1)
+        rows.append(results)
+        print(f"  {opponent_name:>6} rave={use_rave!s:<5} search_length={search_length:>3} "
+              f"score={results['score']:.2f} sims/move={results['simulations_per_move']:.1f}")
+        if results["score"] >= TARGET_SCORES[opponent_name]:
+            return search_length, rows
+    return None, rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--model-weights", default=None)
+    parser.add_argument("--value-weights", default=None)
+    args = parser.parse_args()
+
+    summary = {}
+    for opponent_name in ["random", "solver"]:
+        for use_rave in [False, True]:
+            needed, _ = simulations_to_target(opponent_name, use_rave, args.games, args.model_weights, args.value_weights)
+            summary[(opponent_name, use_rave)] = needed
+
+    print("\nsearch_length needed for target score:")
+    for (opponent_name, use_rave), needed in summary.items():
+        label = "RAVE" if use_rave else "UCB"
+        print(f"  vs {opponent_name:<6} (target {TARGET_SCORES[opponent_name]:.2f}) {label:<4}: {needed if needed else 'not reached'}")
@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import torch
+from arena import MCTSAgent, OPPONENTS, make_mcts, play_match
+
+# Strength per CPU-second: sweeps search_length, leaf batch size and torch thread count, plays every
+# point against the fixed opponents and writes the results to benchmarks/ (git-ignored) as JSON for later comparison.
+
+SEARCH_LENGTHS = [8, 16, 32, 64, 128]
+BATCH_SIZES = [1, 4, 8]
+THREAD_COUNTS = [1, 2, 4]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_point(search_length, batch_size, threads, num_games, model_weights=None, value_weights=None):
+    torch.set_num_threads(threads)
+    point = {"search_length": search_length, "batch_size": batch_size, "threads": threads, "opponents": {}}
+    for opponent_name, opponent in OPPONENTS.items():
+        agent = MCTSAgent(make_mcts(search_length, model_weights, value_weights, eval_batch_size=batch_size))
+        results = play_match(agent, opponent, num_games)
+        moves = max(agent.moves, 1)
+        results["wall_seconds"] = agent.seconds
+        results["cpu_seconds"] = agent.cpu_seconds
+        results["cpu_seconds_per_move"] = agent.cpu_seconds / moves
+        results["simulations_per_move"] = agent.simulations / moves
+        results["simulations_per_second"] = agent.simulations / max(agent.seconds, 1e-9)
+        point["opponents"][opponent_name] = results
+    return point
+
+def strength_curve(points, opponent_name):
+    # (cpu seconds per move, score) pairs, cheapest first
+    curve = [(point["opponents"][opponent_name]["cpu_seconds_per_move"], point["opponents"][opponent_name]["score"]) for point in points]
+    return sorted(curve)
+
+def compare(previous_path, points):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    old_points = {(p["search_length"], p["batch_size"], p["threads"]): p for p in previous["points"]}
+    print(f"\nChange against {previous_path} ({previous.get('git_revision')}):")
+    for point in points:
+        key = (point["search_length"], point["batch_size"], point["threads"])
+        if key not in old_points:
+            continue
+        for opponent_name, results in point["opponents"].items():
+            old = old_points[key]["opponents"].get(opponent_name)
+            if old:
+                print(f"  {key} vs {opponent_name:<6} score {old['score']:.2f} -> {results['score']:.2f}, "
+                      f"sims/s {old['simulations_per_second']:.0f} -> {results['simulations_per_second']:.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--search-lengths", type=int, nargs="+", default=SEARCH_LENGTHS)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=BATCH_SIZES)
+    parser.add_argument("--threads", type=int, nargs="+", default=THREAD_COUNTS)
+    parser.add_argument("--model-weights", default=None)
+    parser.add_argument("--value-weights", default=None)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None, help="earlier results JSON to diff against")
+    args = parser.parse_args()
+
+    points = []
+    for search_length in args.search_lengths:
+        for batch_size in args.batch_sizes:
+            for threads in args.threads:
+                point = run_point(search_length, batch_size, threads, args.games, args.model_weights, args.value_weights)
+                points.append(point)
+                summary = ", ".join(f"{name} {r['score']:.2f}" for name, r in point["opponents"].items())
+                sims_per_second = point["opponents"]["random"]["simulations_per_second"]
+                print(f"search_length={search_length:>4} batch={batch_size:>2} threads={threads:>2} "
+                      f"sims/s={sims_per_second:>7.0f} score: {summary}")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_revision": git_revision(),
+        "torch_version": torch.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "games_per_opponent": args.games,
+        "points": points,
+        "curves": {name: strength_curve(points, name) for name in OPPONENTS},
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"scaling_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    for opponent_name, curve in report["curves"].items():
+        print(f"\nStrength vs CPU-seconds per move ({opponent_name}):")
+        for cpu_seconds, score in curve:
+            print(f"  {cpu_seconds:8.4f}s  score={score:.2f}")
+
+    if args.compare:
+        compare(args.compare, points)
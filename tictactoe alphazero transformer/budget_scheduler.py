@@ -0,0 +1,63 @@
+import math
+from constants import DIMENSION
+
+# Per-move simulation budgets. Positions with a flat prior, an uncertain value and many legal moves get
+# up to max_simulations; forced moves and positions the value net already considers decided get few.
+
+class AdaptiveSimulationBudget:
+    def __init__(self, min_simulations=8, max_simulations=None, entropy_weight=0.4, value_weight=0.4, moves_weight=0.2):
+        self.min_simulations = min_simulations
+        self.max_simulations = max_simulations  # None means MCTS.search_length
+        self.entropy_weight = entropy_weight
+        self.value_weight = value_weight
+        self.moves_weight = moves_weight
+
+        self.moves = 0
+        self.games = 0
+        self.budgeted_simulations = 0
+        self.simulations = 0  # Actually run, searches stop early on solved roots and Gumbel halving
+        self.fixed_simulations = 0  # MCTS.search_length per move, the budget a fixed search would be given
+
+    def budget(self, mcts, root):
+        max_simulations = self.max_simulations or mcts.search_length
+        legal_moves = len(root.children)
+        if legal_moves <= 1:
+            simulations = 1  # Forced move, one visit is enough to pick it
+        else:
+            priors = [child.prior for child in root.children] if mcts.use_priors else [1 / legal_moves] * legal_moves
+            entropy = -sum(prior * math.log(prior) for prior in priors if prior > 0) / math.log(legal_moves)
+            certainty = min(abs(mcts.evaluate_leaves([root])[0]), 1.0)
+            criticality = (self.entropy_weight * entropy
+                           + self.value_weight * (1 - certainty)
+                           + self.moves_weight * legal_moves / (DIMENSION * DIMENSION))
+            simulations = int(round(self.min_simulations + (max_simulations - self.min_simulations) * criticality))
+
+        self.moves += 1
+        self.budgeted_simulations += simulations
+        self.fixed_simulations += mcts.search_length
+        return simulations
+
+    def record(self, simulations):
+        # Called by MCTS.record_search once a search with a budget from here is done
+        self.simulations += simulations
+
+    def report(self, num_games=0):
+        # num_games: games played since the previous report, all figures are totals since the start.
+        # Savings are split: what the smaller budgets saved against fixed ones, and what searches stopping
+        # before their budget (solved root, Gumbel halving done) saved on top; a fixed search stops early too
+        self.games += num_games
+        budget_saved = self.fixed_simulations - self.budgeted_simulations
+        early_stop_saved = self.budgeted_simulations - self.simulations
+        summary = {
+            "moves": self.moves,
+            "games": self.games,
+            "budgeted_simulations": self.budgeted_simulations,
+            "simulations": self.simulations,
+            "fixed_simulations": self.fixed_simulations,
+            "saved_fraction": budget_saved / self.fixed_simulations if self.fixed_simulations else 0.0,
+            "early_stop_fraction": early_stop_saved / self.fixed_simulations if self.fixed_simulations else 0.0,
+        }
+        if self.games:
+            summary["saved_per_game"] = budget_saved / self.games
+            summary["early_stop_per_game"] = early_stop_saved / self.games
+        return summary
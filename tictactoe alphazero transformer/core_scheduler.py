@@ -0,0 +1,119 @@
+import argparse
+import os
+import torch
+
+# Core sets and thread counts for the processes of the training pipeline sharing one machine (self-play
+# actors, the learner, arena evaluation). Every role gets a share of the cores, each process of a role its
+# own slice of that share, pinned with sched_setaffinity. Pinned processes size their torch thread pools
+# from the affinity they were given (sync_threads_to_affinity), so pinning alone also tells them how many
+# threads to run; unpinned ones keep their configured count. rebalance() moves cores between a producer and a consumer role from the depth of the queue
+# between them. Without sched_setaffinity (macOS, Windows) only the thread counts are managed.
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def sync_threads_to_affinity():
+    # Called by worker processes between work items; returns the thread count now in use
+    threads = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else torch.get_num_threads()
+    if threads != torch.get_num_threads():
+        torch.set_num_threads(threads)
+    return threads
+
+class CoreScheduler:
+    def __init__(self, weights, cores=None, high_water=0.75, low_water=0.25):
+        self.cores = sorted(cores) if cores else available_cores()
+        self.roles = list(weights)
+        self.processes = {role: [] for role in self.roles}
+        self.high_water = high_water  # Queue fill above which the consumer gets a core from the producer
+        self.low_water = low_water  # Queue fill below which the producer gets a core back
+        self.rebalances = 0
+
+        # Cores per role, proportional to the weights (largest remainder). Every role gets at least one core,
+        # taken from the largest allocation, so the counts add up to the core count whenever there are at
+        # least as many cores as roles
+        total = sum(weights.values())
+        shares = {role: len(self.cores) * weights[role] / total for role in self.roles}
+        self.core_counts = {role: int(shares[role]) for role in self.roles}
+        by_remainder = sorted(self.roles, key=lambda role: shares[role] - int(shares[role]), reverse=True)
+        for role in by_remainder[:len(self.cores) - sum(self.core_counts.values())]:
+            self.core_counts[role] += 1
+        for role in self.roles:
+            if self.core_counts[role] == 0:
+                largest = max(self.roles, key=lambda other: self.core_counts[other])
+                if self.core_counts[largest] > 1:
+                    self.core_counts[largest] -= 1
+                self.core_counts[role] = 1
+
+    def role_cores(self):
+        # Contiguous core ranges per role; with fewer cores than roles the ranges wrap around and overlap
+        assignment = {}
+        start = 0
+        for role in self.roles:
+            assignment[role] = [self.cores[(start + offset) % len(self.cores)] for offset in range(self.core_counts[role])]
+            start += self.core_counts[role]
+        return assignment
+
+    def process_cores(self):
+        # pid -> core set; a role's processes split its cores, sharing them round robin when outnumbering them
+        assignment = {}
+        for role, cores in self.role_cores().items():
+            pids = self.processes[role]
+            for index, pid in enumerate(pids):
+                if len(pids) <= len(cores):
+                    share = len(cores) // len(pids)
+                    extra = 1 if index < len(cores) % len(pids) else 0
+                    start = index * share + min(index, len(cores) % len(pids))
+                    assignment[pid] = set(cores[start:start + share + extra])
+                else:
+                    assignment[pid] = {cores[index % len(cores)]}
+        return assignment
+
+    def register(self, role, pid=None):
+        self.processes[role].append(os.getpid() if pid is None else pid)
+        self.apply()
+
+    def unregister(self, pid):
+        for pids in self.processes.values():
+            if pid in pids:
+                pids.remove(pid)
+        self.apply()
+
+    def apply(self):
+        for pid, cores in self.process_cores().items():
+            if hasattr(os, "sched_setaffinity"):
+                try:
+                    os.sched_setaffinity(pid, cores)
+                except (ProcessLookupError, PermissionError):
+                    continue  # Exited or not ours, dropped on unregister
+            if pid == os.getpid():
+                torch.set_num_threads(len(cores))
+
+    def rebalance(self, producer, consumer, depth, capacity):
+        # A full queue means the consumer can't keep up, an empty one that the producer can't
+        fill = depth / capacity if capacity else 0.0
+        if fill > self.high_water and self.core_counts[producer] > 1:
+            source, target = producer, consumer
+        elif fill < self.low_water and self.core_counts[consumer] > 1:
+            source, target = consumer, producer
+        else:
+            return False
+        self.core_counts[source] -= 1
+        self.core_counts[target] += 1
+        self.rebalances += 1
+        self.apply()
+        return True
+
+    def report(self):
+        return {role: {"cores": cores, "processes": len(self.processes[role])} for role, cores in self.role_cores().items()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--selfplay", type=float, default=6)
+    parser.add_argument("--learner", type=float, default=3)
+    parser.add_argument("--arena", type=float, default=1)
+    args = parser.parse_args()
+    scheduler = CoreScheduler({"selfplay": args.selfplay, "learner": args.learner, "arena": args.arena})
+    for role, entry in scheduler.report().items():
+        print(f"{role:<8} cores={entry['cores']}")
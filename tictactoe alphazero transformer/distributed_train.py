@@ -0,0 +1,178 @@
+import argparse
+import io
+import multiprocessing
+import os
+import queue
+import random
+import socket
+import sys
+import time
+from collections import deque
+import torch
+import torch.distributed as dist
+from train import train_model
+from model import TicTacToeTransformerSeq
+from game_logic import generate_random_games
+
+# Data-parallel CPU training with torch.distributed (gloo). Ranks are forked from the caller, each trains on
+# its shard of the data and every optimizer step averages the gradients of all ranks with one all-reduce,
+# so all ranks keep identical weights. Rank 0 sends the trained state dicts back; they are loaded into the
+# caller's networks, so checkpoints look exactly like single-process ones.
+
+class AllReduceOptimizer:
+    # Wraps an optimizer; step() averages gradients over the ranks first. Parameters without a gradient
+    # on every rank keep grad None, so the wrapped optimizer skips them as it would in one process
+    def __init__(self, optimizer, world_size):
+        self.optimizer = optimizer
+        self.world_size = world_size
+        self.param_groups = optimizer.param_groups
+
+    def zero_grad(self):
+        self.optimizer.zero_grad()
+
+    def state_dict(self):
+        return self.optimizer.state_dict()
+
+    def step(self):
+        parameters = [parameter for group in self.optimizer.param_groups for parameter in group["params"]]
+        gradients = [parameter.grad.reshape(-1) if parameter.grad is not None else torch.zeros(parameter.numel()) for parameter in parameters]
+        has_gradient = torch.tensor([parameter.grad is not None for parameter in parameters], dtype=torch.float32)
+        flat = torch.cat(gradients + [has_gradient])
+        dist.all_reduce(flat)
+
+        ranks_with_gradient = flat[-len(parameters):]
+        offset = 0
+        for index, parameter in enumerate(parameters):
+            size = parameter.numel()
+            if ranks_with_gradient[index] > 0:
+                parameter.grad = (flat[offset:offset + size] / self.world_size).view_as(parameter).clone()
+            offset += size
+        self.optimizer.step()
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+def rank_worker(rank, world_size, port, threads_per_rank, random_state, train, networks, optimizer, results):
+    # Python reseeds `random` in forked children; ranks continue from the caller's state instead, so one
+    # rank reproduces the single-process run and the others get their own streams
+    random.setstate(random_state)
+    if rank != 0:
+        random.seed(random.getrandbits(64) + rank)
+    torch.set_num_threads(threads_per_rank)
+    dist.init_process_group("gloo", init_method=f"tcp://127.0.0.1:{port}", rank=rank, world_size=world_size)
+    if rank != 0:
+        sys.stdout = open(os.devnull, "w")
+    try:
+        # Forked ranks start from the same weights already; the broadcast makes it explicit
+        for network in networks:
+            for tensor in network.state_dict().values():
+                dist.broadcast(tensor, 0)
+        started = time.time()
+        train(rank, AllReduceOptimizer(optimizer, world_size))
+        if rank == 0:
+            # Sent as bytes: queued tensors would be shared through file descriptors that close when the rank exits
+            buffer = io.BytesIO()
+            torch.save(([network.state_dict() for network in networks], optimizer.state_dict()), buffer)
+            results.put((buffer.getvalue(), time.time() - started))
+    finally:
+        dist.destroy_process_group()
+
+def check_ranks(workers):
+    failed = {rank: worker.exitcode for rank, worker in enumerate(workers) if worker.exitcode not in (None, 0)}
+    if failed:
+        raise RuntimeError(f"training ranks failed (rank: exit code): {failed}")
+
+def run_ranks(world_size, threads_per_rank, train, networks, optimizer, poll_seconds=1.0):
+    # Runs train(rank, optimizer) on every rank and loads rank 0's weights and optimizer state back
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    results = context.Queue()
+    port = free_port()
+    workers = [
+        context.Process(target=rank_worker, args=(rank, world_size, port, threads_per_rank, random.getstate(), train, networks, optimizer, results))
+        for rank in range(world_size)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        # A rank that dies (gloo init, a failing step) would leave the others blocked in a collective and
+        # the caller waiting forever; poll the exit codes and give up on the first failure
+        while True:
+            try:
+                blob, seconds = results.get(timeout=poll_seconds)
+                break
+            except queue.Empty:
+                check_ranks(workers)
+                if all(worker.exitcode is not None for worker in workers):
+                    raise RuntimeError("all ranks exited without sending results")
+        state_dicts, optimizer_state = torch.load(io.BytesIO(blob))
+        for worker in workers:
+            worker.join()
+        check_ranks(workers)
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+
+    for network, state_dict in zip(networks, state_dicts):
+        network.load_state_dict(state_dict)
+    optimizer.load_state_dict(optimizer_state)
+    return seconds
+
+def train_model_parallel(model, replay_buffer, world_size, num_epochs=100, batch_size=32, learning_rate=0.001, optimizer=None, threads_per_rank=1, verbose=True):
+    # train.train_model on world_size ranks; batch_size is the global batch, split evenly over the ranks
+    if optimizer is None:
+        optimizer = torch.optim.Adam(model.parameters(), lr=learning_rate)
+    rank_batch_size = max(1, batch_size // world_size)
+
+    def train(rank, rank_optimizer):
+        train_model(model, replay_buffer, num_epochs=num_epochs, batch_size=rank_batch_size, optimizer=rank_optimizer,
+                    verbose=verbose and rank == 0, shard=(rank, world_size))
+
+    run_ranks(world_size, threads_per_rank, train, [model], optimizer)
+    return model
+
+def train_networks_parallel(mcts, num_epochs, world_size, threads_per_rank=1):
+    # MCTS.train_networks on world_size ranks, each taking an equal share of the unique positions
+    optimizer = mcts.model.optimizer
+
+    def train(rank, rank_optimizer):
+        mcts.model.optimizer = rank_optimizer
+        mcts.train_networks(num_epochs, shard=(rank, world_size))
+
+    run_ranks(world_size, threads_per_rank, train, [mcts.model, mcts.value_net], optimizer)
+
+def benchmark(max_ranks, num_games, num_epochs, batch_size):
+    # train_model throughput at 1..max_ranks ranks with the same global batch, single-threaded ranks
+    replay_buffer = deque(maxlen=10000)
+    generate_random_games(num_games, replay_buffer)
+    baseline = None
+    world_size = 1
+    while world_size <= max_ranks:
+        torch.manual_seed(0)
+        model = TicTacToeTransformerSeq()
+        optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+        rank_batch_size = max(1, batch_size // world_size)
+
+        def train(rank, rank_optimizer):
+            train_model(model, replay_buffer, num_epochs=num_epochs, batch_size=rank_batch_size, optimizer=rank_optimizer,
+                        verbose=False, shard=(rank, world_size))
+
+        seconds = run_ranks(world_size, 1, train, [model], optimizer)
+        baseline = baseline or seconds
+        steps = num_epochs * 10
+        print(f"ranks={world_size:>2} seconds={seconds:.2f} steps/s={steps / seconds:.1f} "
+              f"samples/s={steps * batch_size / seconds:.0f} speedup={baseline / seconds:.2f}x")
+        world_size *= 2
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-ranks", type=int, default=min(8, os.cpu_count() or 1))
+    parser.add_argument("--games", type=int, default=3000)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+    benchmark(args.max_ranks, args.games, args.epochs, args.batch_size)
@@ -0,0 +1,96 @@
+import math
+import numpy as np
+from constants import DIMENSION
+
+# Gumbel root search (Danihelka et al., "Policy improvement by planning with Gumbel"). The root samples
+# m moves without replacement through Gumbel-top-k on the prior logits, then splits the simulation budget
+# over them by sequential halving: each phase gives every remaining move the same number of visits and
+# keeps the better half by g + logit + sigma(q). Children are searched with the usual PUCT below the root.
+# Moves the solver has proven get no more visits and compete by their proven value.
+
+class GumbelRoot:
+    def __init__(self, root, budget, considered=16, c_visit=50, c_scale=1.0):
+        self.root = root
+        self.c_visit = c_visit
+        self.c_scale = c_scale
+        self.logits = np.log(np.maximum([child.prior for child in root.children], 1e-12))
+        self.gumbels = np.random.gumbel(size=len(root.children))
+
+        considered = min(considered, len(root.children))
+        self.remaining = list(np.argsort(-(self.gumbels + self.logits))[:considered])
+        self.phases_left = max(1, math.ceil(math.log2(considered))) if considered > 1 else 1
+        self.budget_left = budget
+        self.finished = considered == 0
+        self.start_phase()
+
+    def unproven(self):
+        return [index for index in self.remaining if self.root.children[index].proven is None]
+
+    def start_phase(self):
+        self.phase_visits = max(1, self.budget_left // (self.phases_left * max(1, len(self.unproven()))))
+        self.visits_this_phase = {index: 0 for index in self.remaining}
+
+    def next_actions(self, budget_left):
+        # Unproven children still owed a visit in this phase, at most one each per step so their leaves are distinct
+        self.budget_left = budget_left
+        while not self.finished and budget_left > 0:
+            actions = [index for index in self.unproven() if self.visits_this_phase[index] < self.phase_visits]
+            if actions:
+                actions = actions[:budget_left]
+                for index in actions:
+                    self.visits_this_phase[index] += 1
+                return actions
+            self.end_phase()
+        return []
+
+    def end_phase(self):
+        self.phases_left -= 1
+        if len(self.remaining) == 1 or self.phases_left == 0:
+            self.finished = True
+            return
+        self.remaining.sort(key=self.score, reverse=True)
+        self.remaining = self.remaining[:math.ceil(len(self.remaining) / 2)]
+        self.start_phase()
+
+    def q_value(self, index):
+        child = self.root.children[index]
+        if child.proven is not None:
+            return child.proven
+        return child.value / child.visits if child.visits > 0 else None
+
+    def mixed_value(self):
+        # Prior-weighted mean of the visited moves' values, stands in for unvisited moves
+        weights, values = [], []
+        for index, child in enumerate(self.root.children):
+            q = self.q_value(index)
+            if q is not None:
+                weights.append(child.prior)
+                values.append(q)
+        if not values:
+            return 0.0
+        return float(np.average(values, weights=weights)) if sum(weights) > 0 else float(np.mean(values))
+
+    def sigma(self, q):
+        # Monotone transform of the normalised value, growing with the visit count
+        max_visits = max(child.visits for child in self.root.children)
+        return (self.c_visit + max_visits) * self.c_scale * (q + 1) / 2
+
+    def score(self, index):
+        q = self.q_value(index)
+        return self.gumbels[index] + self.logits[index] + self.sigma(self.mixed_value() if q is None else q)
+
+    def best(self):
+        return max(self.remaining, key=self.score)
+
+    def improved_policy(self):
+        # softmax(logits + sigma(completed Q)) over the legal moves, the policy target for training
+        mixed_value = self.mixed_value()
+        completed = [self.q_value(index) for index in range(len(self.root.children))]
+        scores = np.array([self.logits[index] + self.sigma(mixed_value if q is None else q) for index, q in enumerate(completed)])
+        probabilities = np.exp(scores - scores.max())
+        probabilities /= probabilities.sum()
+
+        policy = [0] * (DIMENSION * DIMENSION)
+        for child, probability in zip(self.root.children, probabilities):
+            policy[child.move[0] * DIMENSION + child.move[1]] = float(probability)
+        return policy
@@ -0,0 +1,135 @@
+from constants import DIMENSION
+import numpy as np
+import random
+from resignation import move_value
+from tqdm import tqdm
+
+# Lockstep self-play: G games advance together. Every step runs one search step in each game's tree,
+# then evaluates the pending leaves of all games with one batched value call, which also prefetches
+# the leaves' policies (MCTS.prefetch_leaf_priors). Root priors of games starting a new move are batched too.
+# All trees share the MCTS node pool, so MCTS.max_nodes bounds their combined size.
+
+class LockstepGame:
+    def __init__(self):
+        self.state = np.zeros((DIMENSION, DIMENSION))
+        self.player = 1
+        self.game_history = []
+        self.root = None
+        self.simulations = 0
+        self.resign_game = None
+
+def collect_step_leaves(mcts, searches):
+    # One search step in each (root, simulations) search; the leaves' boards are packed into one block of rows
+    boards = mcts.leaf_boards(sum(mcts.max_step_leaves(root, simulations) for root, simulations in searches))
+    leaves_per_search = []
+    offset = 0
+    for root, simulations in searches:
+        leaves = mcts.next_leaves(root, simulations, boards[offset:])
+        leaves_per_search.append(leaves)
+        offset += len(leaves)
+    return leaves_per_search, boards[:offset]
+
+def lockstep_self_play(mcts, num_games=100, concurrent_games=16):
+    prefetch_leaf_priors = mcts.prefetch_leaf_priors
+    mcts.prefetch_leaf_priors = True
+    games_started = 0
+    active = []
+    progress = tqdm(total=num_games)
+
+    while games_started < num_games or active:
+        while games_started < num_games and len(active) < concurrent_games:
+            game = LockstepGame()
+            if mcts.resignation is not None:
+                game.resign_game = mcts.resignation.new_game()
+            active.append(game)
+            games_started += 1
+
+        # Root priors of all newly started searches come from one batched policy call
+        starting = [game for game in active if game.root is None]
+        if starting:
+            policies = mcts.get_policy_values_batch([game.state for game in starting])
+            for game, policy_values in zip(starting, policies):
+                game.root = mcts.start_search(game.state, game.player, policy_values, random.random() < mcts.full_search_fraction)
+                game.simulations = 0
+
+        # Gather this step's leaves from every unfinished search
+        searching = [game for game in active if not mcts.search_done(game.root, game.simulations)]
+        leaves_per_game, boards = collect_step_leaves(mcts, [(game.root, game.simulations) for game in searching])
+
+        all_leaves = [leaf for leaves in leaves_per_game for leaf in leaves]
+        value_estimates = mcts.evaluate_leaves(all_leaves, boards)
+
+        offset = 0
+        for game, leaves in zip(searching, leaves_per_game):
+            mcts.finish_step(leaves, value_estimates[offset:offset + len(leaves)])
+            offset += len(leaves)
+            game.simulations += len(leaves)
+
+        # Play a move in every game whose search is done, games finish independently
+        still_active = []
+        for game in active:
+            if not mcts.search_done(game.root, game.simulations):
+                still_active.append(game)
+                continue
+
+            mcts.record_search(game.root, game.simulations)
+            best_child_node = mcts.choose_best_child(game.root)
+            mcts_policy = mcts.search_policy(best_child_node) if game.root.full_search else None  # Fast searches only give a value target
+            game.game_history.append((game.state, mcts_policy, None))  # 'None' is a placeholder for the reward.
+            winner = None
+            if game.resign_game is not None:
+                winner = mcts.resignation.check(game.resign_game, game.state, game.player, move_value(best_child_node))
+            if winner is None:
+                game.state = best_child_node.state
+                game.player = 3 - game.player
+            mcts.node_pool.release_tree(game.root)
+            game.root = None
+
+            if winner is None and mcts.board.who_wins(game.state) == 2:
+                still_active.append(game)
+            else:
+                if game.resign_game is not None:
+                    mcts.resignation.finish(game.resign_game, winner if winner is not None else mcts.board.who_actually_wins(game.state))
+                mcts.training_data += mcts.assign_game_rewards(game.game_history, game.state, winner)
+                progress.update(1)
+        active = still_active
+
+    progress.close()
+    mcts.prefetch_leaf_priors = prefetch_leaf_priors
+    if mcts.budget_scheduler is not None:
+        print(f"Simulation budget: {mcts.budget_scheduler.report(num_games)}")
+    if mcts.resignation is not None:
+        print(f"Resignation: {mcts.resignation.report()}")
+
+def lockstep_search(mcts, positions):
+    # Runs one full search per (state, player) together, batching evaluations the same way, and
+    # returns the chosen move for each position
+    prefetch_leaf_priors = mcts.prefetch_leaf_priors
+    mcts.prefetch_leaf_priors = True
+
+    policies = mcts.get_policy_values_batch([state for state, _ in positions])
+    roots = [mcts.start_search(state.copy(), player, policy_values) for (state, player), policy_values in zip(positions, policies)]
+    simulations = [0] * len(roots)
+
+    while True:
+        searching = [index for index, root in enumerate(roots) if not mcts.search_done(root, simulations[index])]
+        if not searching:
+            break
+        leaves_per_search, boards = collect_step_leaves(mcts, [(roots[index], simulations[index]) for index in searching])
+        value_estimates = mcts.evaluate_leaves([leaf for leaves in leaves_per_search for leaf in leaves], boards)
+
+        offset = 0
+        for index, leaves in zip(searching, leaves_per_search):
+            mcts.finish_step(leaves, value_estimates[offset:offset + len(leaves)])
+            offset += len(leaves)
+            simulations[index] += len(leaves)
+
+    moves = []
+    for root, root_simulations in zip(roots, simulations):
+        mcts.record_search(root, root_simulations)
+        best_child_node = mcts.choose_best_child(root)
+        moves.append(best_child_node.move if best_child_node is not None else None)
+        mcts.node_pool.release_tree(root)
+
+    mcts.prefetch_leaf_priors = prefetch_leaf_priors
+    return moves
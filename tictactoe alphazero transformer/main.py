@@ -1,34 +1,65 @@
-from train import train_model
 from play import play_game, play_game_with_random_agent
-from model import TicTacToeTransformerSeq
 from constants import EMPTY_TABLE, DIMENSION
-from collections import deque
 import numpy as np
+import os
 import random
 from mcts_code import MCTS, Board, play_mcts_vs_mcts, play_mcts_vs_random
-from game_logic import generate_random_games
+from pretrain_cache import load_or_pretrain, load_or_save_value_net, CACHE_DIR
+from lockstep import lockstep_self_play
+from reanalyse import Reanalyser
+from opening_book import OpeningBook, DEFAULT_PATH as OPENING_BOOK_PATH
+from resignation import Resignation
+from sample_store import SampleStore
+from solver import position_value
+from core_scheduler import CoreScheduler
 
 
-# Initialize Replay Buffer and Model
-replay_buffer = deque(maxlen=10000)
-generate_random_games(10000, replay_buffer)
-
-# Train Model
-model = TicTacToeTransformerSeq()
-model = train_model(model, replay_buffer)  # Assuming train_model updates the model in-place
+# Initialize Replay Buffer and Model (random games + pretraining, reused from cache/ when the config is unchanged)
+replay_buffer, model = load_or_pretrain(num_games=10000, buffer_size=10000, num_epochs=100, batch_size=32)
 
 # Create MCTS instance with model
 board = Board()
 mcts = MCTS(model)
+load_or_save_value_net(mcts.value_net)  # Same initial value net every launch, so the opening book hits across runs
+mcts.training_data = SampleStore(max_samples=50000, spill_dir=os.path.join(CACHE_DIR, "samples"), max_shards=100,
+                                resume=False)  # Older samples spill to disk; shards of earlier runs came from other networks
+mcts.spilled_training_shards = 20  # Train on the newest 200k spilled samples besides the ones in memory
+mcts.full_search_fraction = 0.25  # Most self-play moves use a fast search and only give value targets
+mcts.resignation = Resignation(threshold=0.9, consecutive_moves=2, playout_fraction=0.1, oracle=position_value)
+
+# Background worker refreshing stored self-play targets with the latest weights
+reanalyser = Reanalyser(mcts, compute_fraction=0.25)
+reanalyser.start()
+
+# Self-play and training alternate in this process; the reanalyse worker is pinned to its own share of the cores
+core_scheduler = CoreScheduler({"selfplay": 3, "reanalyse": 1})
+core_scheduler.register("selfplay")
+core_scheduler.register("reanalyse", reanalyser.process.pid)
+print(f"Core assignment: {core_scheduler.report()}")
+
+# Deep searches of the first plies, stored per model version and reused across runs
+opening_book = OpeningBook(OPENING_BOOK_PATH)  # Next to this module, whatever the working directory
 
 for i in range(2):
+    # Extend the opening book for the current weights (entries from earlier runs are kept)
+    opening_book.build(mcts, plies=3, search_length=1000)
+    opening_book.save()
+
     # Generate data from self-play
     print("\nSelf play:")
-    mcts.self_play(num_games=100)
+    lockstep_self_play(mcts, num_games=100, concurrent_games=16)
+
+    # Pick up refreshed targets and queue more stored positions
+    reanalyser.apply_updates()
+    reanalyser.submit()
 
     print("\nMCTS learning:")
     # Train networks on the generated data
     mcts.train_networks(num_epochs=10)
+    reanalyser.sync_weights()
+
+reanalyser.stop()
+print(f"Reanalysed targets: {reanalyser.refreshed}")
 
 # Play Games using Trained Model
 print("\nTransformer vs Transformer Games:")
@@ -1,5 +1,4 @@
 from constants import EMPTY_TABLE, DIMENSION
-from copy import deepcopy
 import random
 import math
 import numpy as np
@@ -7,6 +6,10 @@ import torch
 import torch.nn.functional as F
 import torch.optim as optim
 from tqdm import tqdm
+from training_set import aggregate_samples
+from resignation import move_value
+from gumbel import GumbelRoot
+from sample_store import SampleStore
 
 class Board:
     def row_checker(self, state):
@@ -87,6 +90,14 @@ class Board:
         
         return 0
 
+    def outcome_for(self, state, player):
+        # Result of a finished game from the point of view of `player`: 1 win, -1 loss, 0 draw
+        result = self.who_wins(state)
+        if result == 0:
+            return 0
+        winner = 1 if result == 1 else 2
+        return 1 if winner == player else -1
+
     def print_formatting(self, state):
         for i in range(len(state)):
             print(state[i])
@@ -105,23 +116,68 @@ class ValueNet(torch.nn.Module):
 
 
 class Node():
+    # Only the root keeps a board (root_state); every other node stores its move, and search plays the
+    # moves on the root's board while descending and takes them back afterwards (see MCTS.selection)
+    __slots__ = ("parent", "root_state", "player", "children", "move", "value", "visits", "proven",
+                 "amaf_value", "amaf_visits", "prior", "policy", "simulation_budget", "full_search", "gumbel",
+                 "book_policy")
+
     def __init__(self, parent, state, move=None):
+        self.reset(parent, state, move)
+
+    def reset(self, parent, state, move=None):
         self.parent = parent
-        self.state = state
+        self.root_state = state  # Root only: the search board, children pass None
         self.player = None
         self.children = []  # Initialize to an empty list
         self.move = move
 
         self.value = 0
         self.visits = 0
+        self.proven = None  # Solved outcome for self.player: 1 win, -1 loss, 0 draw, None unknown
+
+        # All-moves-as-first statistics: results of simulations where this move was played later on
+        self.amaf_value = 0
+        self.amaf_visits = 0
+
+        self.prior = 0  # Policy probability of this move, set when the parent is expanded
+        self.policy = None  # Policy network output for this node's state, computed once at expansion
+        self.simulation_budget = None  # Root only: simulations for this search, None means MCTS.search_length
+        self.full_search = True  # Root only: False for a playout-capped fast search, which gives no policy target
+        self.gumbel = None  # Root only: GumbelRoot running sequential halving over the root moves
+        self.book_policy = None  # Root only: stored visit distribution when the position came from the opening book
+
+    @property
+    def state(self):
+        # Board of this node, rebuilt from the root's board and the moves on the path; allocates a new array.
+        # For drivers and debugging only, the search itself works on the root's board (see MCTS.selection)
+        moves = []
+        node = self
+        while node.root_state is None:
+            moves.append((node.move, node.player))
+            node = node.parent
+        state = node.root_state.copy()
+        for (row, column), player in moves:
+            state[row][column] = player
+        return state
+
+    def mean_value(self, rave_equivalence=None):
+        value = self.value / self.visits
+        if rave_equivalence is None or self.amaf_visits == 0:
+            return value
+        # RAVE schedule: trust AMAF early, move to the node's own average as visits grow
+        beta = math.sqrt(rave_equivalence / (3 * self.visits + rave_equivalence))
+        return (1 - beta) * value + beta * self.amaf_value / self.amaf_visits
     
-    def choose_node(self, exploration_constant):
+    def choose_node(self, exploration_constant, rave_equivalence=None):
         best_ucb = float('-inf')
         best_node = None
 
         for child in self.children:
+            if child.proven is not None:  # Solved subtrees need no more simulations
+                continue
             if child.visits > 0:
-                ucb = child.value/child.visits + exploration_constant * math.sqrt((math.log(self.visits))/child.visits)
+                ucb = child.mean_value(rave_equivalence) + exploration_constant * math.sqrt((math.log(self.visits))/child.visits)
             else:
                 ucb = float('inf')
 
@@ -131,23 +187,73 @@ class Node():
 
         return best_node
     
-    def create_children(self):  
+    def create_children(self, pool=None, state=None):
+        # state: this node's board when the caller already has it (the search board), rebuilt otherwise
+        if state is None:
+            state = self.state
         list_of_children = []
 
         for row in range(DIMENSION):
             for column in range(DIMENSION):
-                if self.state[row][column] == 0:
-                    temporary_state = deepcopy(self.state)
-                    temporary_state[row][column] = 3 - self.player
-
+                if state[row][column] == 0:
                     move = (row, column)
-                    temporary_node = Node(self, deepcopy(temporary_state), move)
+                    if pool is not None:
+                        temporary_node = pool.acquire(self, None, move)
+                    else:
+                        temporary_node = Node(self, None, move)
                     temporary_node.player = 3 - self.player
 
                     list_of_children.append(temporary_node)
         
         self.children = list_of_children
 
+
+class NodePool:
+    # Hands out Node objects and takes them back, so a capped tree reuses memory instead of growing
+    def __init__(self):
+        self.free_nodes = []
+        self.live_nodes = 0
+        self.peak_live_nodes = 0
+        self.recycled_nodes = 0
+        self.pruned_subtrees = 0
+
+    def acquire(self, parent, state, move=None):
+        if self.free_nodes:
+            node = self.free_nodes.pop()
+            node.reset(parent, state, move)
+            self.recycled_nodes += 1
+        else:
+            node = Node(parent, state, move)
+        self.live_nodes += 1
+        self.peak_live_nodes = max(self.peak_live_nodes, self.live_nodes)
+        return node
+
+    def release_children(self, node):
+        # Frees every descendant of node, node itself stays in the tree
+        stack = list(node.children)
+        node.children = []
+        while stack:
+            child = stack.pop()
+            stack.extend(child.children)
+            child.reset(None, None)
+            self.free_nodes.append(child)
+            self.live_nodes -= 1
+
+    def release_tree(self, root):
+        self.release_children(root)
+        root.reset(None, None)
+        self.free_nodes.append(root)
+        self.live_nodes -= 1
+
+    def stats(self):
+        return {
+            "live_nodes": self.live_nodes,
+            "free_nodes": len(self.free_nodes),
+            "peak_live_nodes": self.peak_live_nodes,
+            "recycled_nodes": self.recycled_nodes,
+            "pruned_subtrees": self.pruned_subtrees,
+        }
+
 value_net = ValueNet()
 
 class MCTS:
@@ -158,106 +264,410 @@ class MCTS:
         self.value_net = ValueNet()
         optimizer = optim.Adam(list(model.parameters()) + list(self.value_net.parameters()), lr=0.01)
         self.model.optimizer = optimizer
-        self.training_data = []
+        self.training_data = SampleStore()  # Samples with value targets, bounded in memory (pass spill_dir to keep older ones on disk)
+        self.spilled_training_shards = None  # Newest spilled shards of training_data trained on as well, None means all
         self.value_data = []
-
-    def search(self, state, player):
-        original_state = deepcopy(state)
-        starting_node = Node(None, state)
+        self.use_solver = True  # Propagate proven wins/losses/draws and stop once the root is solved
+        self.last_search_simulations = 0
+        self.use_rave = False  # Blend all-moves-as-first statistics into selection
+        self.rave_equivalence = 300  # Visits at which RAVE and the node's own average weigh the same
+        self.max_nodes = None  # Node budget per search tree, None means unbounded
+        self.prune_fraction = 0.5  # Share of the budget freed when the budget is hit
+        self.node_pool = NodePool()
+        self.last_root = None
+        self.eval_batch_size = 1  # Leaves gathered (with virtual loss) per value network call
+        self.virtual_loss = 1
+        self.pending_leaves = []
+        self.policy_table = None  # Compiled PolicyTable answering policy/value queries instead of the networks
+        self.use_priors = True  # PUCT with per-node policy priors, plain UCB otherwise
+        self.c_puct = 2
+        self.opening_book = None  # OpeningBook with stored deep searches of the first plies
+        self.book_simulations = 0  # Simulations still run from a book position, 0 skips the search
+        self.budget_scheduler = None  # Sets each move's simulation budget, MCTS.search_length for every move otherwise
+        self.full_search_fraction = 1.0  # Playout-cap randomization: share of self-play moves searched with the full budget
+        self.fast_search_length = 16  # Simulations of the other, fast searches
+        self.resignation = None  # Resignation settings for self-play, games are always played out otherwise
+        self.deduplicate_training = True  # Train once per canonical position with averaged, count-weighted targets
+        self.root_selection = "puct"  # "gumbel": Gumbel-top-k root moves with sequential halving, for small budgets
+        self.gumbel_considered = 16  # Root moves sampled for sequential halving
+        self.prefetch_leaf_priors = False  # Compute leaf policies in the batched leaf evaluation instead of one call per expansion
+        self.leaf_board_buffer = np.zeros((0, DIMENSION * DIMENSION), dtype=np.float32)  # Rows selection fills with leaf boards
+
+    def search(self, state, player, full_search=True):
+        # Nodes returned by the previous search are only valid until the next one starts
+        if self.last_root is not None:
+            self.node_pool.release_tree(self.last_root)
+
+        starting_node = self.start_search(state, player, full_search=full_search)
+        self.last_root = starting_node
+
+        self.last_search_simulations = 0
+        while not self.search_done(starting_node, self.last_search_simulations):
+            boards = self.leaf_boards(self.max_step_leaves(starting_node, self.last_search_simulations))
+            leaves = self.next_leaves(starting_node, self.last_search_simulations, boards)
+            self.finish_step(leaves, self.evaluate_leaves(leaves, boards[:len(leaves)]))
+            self.last_search_simulations += len(leaves)
+        self.record_search(starting_node, self.last_search_simulations)
+
+        return self.choose_best_child(starting_node)  # Return the best child node
+
+    # search() split into steps, so drivers running several trees at once can batch their evaluations
+
+    def start_search(self, state, player, policy_values=None, full_search=True):
+        # policy_values lets a caller hand in root priors it already computed in a batch
+        starting_node = self.node_pool.acquire(None, np.array(state, dtype=float))  # The search board, moves are made on it in place
         starting_node.player = 3 - player
         starting_node.visits = 1
-        starting_node.create_children()
+        starting_node.policy = policy_values
+        self.expand(starting_node, starting_node.root_state)
         self.player_here = player
 
-        if not starting_node.children:
-            starting_node.create_children()
-
-        for i in range(self.search_length):
-            policy_values = self.get_policy_values(state)
-            new_node = self.selection(starting_node, policy_values)
-            
-            value_estimate = self.simulation(new_node)
+        if self.opening_book is not None:
+            book_entry = self.opening_book.lookup(state, player)
+            if book_entry is not None:
+                self.seed_from_book(starting_node, book_entry)
+                return starting_node
+
+        if not full_search:
+            starting_node.full_search = False
+            starting_node.simulation_budget = min(self.fast_search_length, self.search_length)
+        elif self.budget_scheduler is not None:
+            starting_node.simulation_budget = self.budget_scheduler.budget(self, starting_node)
+
+        if self.root_selection == "gumbel":
+            starting_node.gumbel = GumbelRoot(starting_node, self.simulation_budget(starting_node), self.gumbel_considered)
+        return starting_node
+
+    def record_search(self, root, simulations):
+        # Simulations a finished search actually ran, for the budget scheduler's report
+        if self.budget_scheduler is not None and root.full_search and root.book_policy is None:
+            self.budget_scheduler.record(simulations)
+
+    def seed_from_book(self, root, book_entry):
+        # Root children start with the stored deep-search visits and values; book_simulations more are run on top
+        for child in root.children:
+            index = child.move[0] * DIMENSION + child.move[1]
+            child.visits = int(round(book_entry["policy"][index] * book_entry["visits"]))
+            child.value = book_entry["q"][index] * child.visits
+            root.visits += child.visits
+        root.book_policy = list(book_entry["policy"])
+        root.simulation_budget = self.book_simulations
+
+    def expand(self, node, state=None):
+        # Priors come from one policy evaluation of node's board (`state`, rebuilt when not given), kept on
+        # the node so a pruned and re-expanded node doesn't ask the network again
+        if state is None:
+            state = node.state
+        node.create_children(self.node_pool, state)
+        if not self.use_priors or not node.children:
+            return
+        if node.policy is None:
+            node.policy = self.get_policy_values(state)
+        legal_total = sum(node.policy[child.move[0] * DIMENSION + child.move[1]] for child in node.children)
+        for child in node.children:
+            prior = node.policy[child.move[0] * DIMENSION + child.move[1]]
+            child.prior = prior / legal_total if legal_total > 0 else 1 / len(node.children)
+
+    def search_solved(self, root):
+        return self.use_solver and root.proven is not None
+
+    def simulation_budget(self, root):
+        return self.search_length if root.simulation_budget is None else root.simulation_budget
+
+    def search_done(self, root, simulations_done):
+        # Out of budget, or the root outcome is forced and more simulations can't change the move
+        if root.gumbel is not None and root.gumbel.finished:
+            return True
+        return simulations_done >= self.simulation_budget(root) or self.search_solved(root)
+
+    def step_batch_size(self, root, simulations_done):
+        return min(self.eval_batch_size, self.simulation_budget(root) - simulations_done)
+
+    def max_step_leaves(self, root, simulations_done):
+        # Upper bound on the leaves next_leaves returns, for sizing the board rows handed to it
+        if root.gumbel is None:
+            return self.step_batch_size(root, simulations_done)
+        return len(root.children)
+
+    def leaf_boards(self, count):
+        # Reused (count, cells) float32 rows; the leaf boards are written straight into the network input
+        if len(self.leaf_board_buffer) < count:
+            self.leaf_board_buffer = np.zeros((count, DIMENSION * DIMENSION), dtype=np.float32)
+        return self.leaf_board_buffer[:count]
+
+    def next_leaves(self, root, simulations_done, boards=None):
+        # Leaves for one search step: PUCT/UCB from the root, or one per root move sequential halving still visits.
+        # boards: rows (at least max_step_leaves) that receive the leaves' boards in order
+        if root.gumbel is None:
+            return self.collect_leaves(root, self.step_batch_size(root, simulations_done), boards)
+        actions = root.gumbel.next_actions(self.simulation_budget(root) - simulations_done)
+        return [self.selection(root.children[index], None if boards is None else boards[row]) for row, index in enumerate(actions)]
+
+    def finish_step(self, leaves, value_estimates):
+        for new_node, value_estimate in zip(leaves, value_estimates):
             self.backpropogation(new_node, value_estimate)
-            
-            current_state = new_node.state
-            mcts_policy = self.get_mcts_policy(new_node)  # get MCTS policy for the current state
-            self.training_data.append((current_state, mcts_policy, None))
 
+    def choose_best_child(self, node):
+        # A proven win is always taken (immediate wins first), proven results otherwise replace the sampled average
+        proven_wins = [child for child in node.children if child.proven == 1]
+        if proven_wins:
+            return min(proven_wins, key=lambda child: len(child.children))
+        if node.gumbel is not None:
+            return node.children[node.gumbel.best()]
 
         best_action_value = float("-inf")
         best_child = None
-        for child in starting_node.children:
+        for child in node.children:
             if child.visits > 0:
-                value = child.value / child.visits
+                value = child.proven if child.proven is not None else child.value / child.visits
                 if value > best_action_value:
                     best_child = child
                     best_action_value = value
-                
-        return best_child  # Return the best child node
+        return best_child
 
 
-    def selection(self, node, policy_values=None):
-        while self.board.who_wins(node.state) == 2:
-            if not node.children:
-                if node.visits == 0:
-                    return node
+    def selection(self, node, leaf_board=None):
+        # Descends on the root's search board: each move is made on the way down and every move is
+        # unmade before returning, so no node needs a board of its own. Expansion uses the same board,
+        # and leaf_board (a flat row) receives the leaf's position for evaluation before the moves are unmade
+        root = node
+        made = []
+        while node.root_state is None:  # Selection may start below the root (Gumbel root moves)
+            made.append(node)
+            node = node.parent
+        state = node.root_state
+        for step in made:
+            state[step.move] = step.player
+        node = root
 
-                node.create_children()
-                # After attempting to create children, if there are still no children
-                # return the current node itself.
+        try:
+            while self.board.who_wins(state) == 2:
                 if not node.children:
-                    return node
-            else:
-                if policy_values is not None:
-                    node = self.choose_node_with_policy(node, policy_values)
+                    if node.visits == 0:
+                        return node
+
+                    if self.max_nodes is not None and self.node_pool.live_nodes + DIMENSION * DIMENSION > self.max_nodes:
+                        self.prune_tree(root, node)
+                    self.expand(node, state)
+                    # After attempting to create children, if there are still no children
+                    # return the current node itself.
+                    if not node.children:
+                        return node
                 else:
-                    node = node.choose_node(2)  # using UCB without policy
+                    if self.use_priors:
+                        node = self.choose_node_with_policy(node)
+                    else:
+                        node = node.choose_node(2, self.rave_schedule())  # using UCB without policy
+                    state[node.move] = node.player
+                    made.append(node)
+        finally:
+            if leaf_board is not None:
+                leaf_board[:] = state.reshape(-1)
+            for step in made:
+                state[step.move] = 0
 
         return node
 
 
 
-    def simulation(self, node):
+    def prune_tree(self, root, keep):
+        # Collapse the least-visited expanded subtrees (never the path to `keep` or to leaves waiting
+        # for evaluation) back into the pool. Collapsed nodes keep their statistics and are expanded
+        # again if selection returns to them.
+        protected = set()
+        for node in [keep] + self.pending_leaves:
+            while node is not None:
+                protected.add(id(node))
+                node = node.parent
+
+        candidates = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for child in node.children:
+                if child.children:
+                    stack.append(child)
+                    if id(child) not in protected:
+                        candidates.append(child)
+        candidates.sort(key=lambda child: child.visits)
+
+        target = int(self.max_nodes * (1 - self.prune_fraction))
+        for candidate in candidates:
+            if self.node_pool.live_nodes <= target:
+                break
+            if candidate.children and candidate.parent is not None:  # Skip nodes already freed with an ancestor
+                self.node_pool.release_children(candidate)
+                self.node_pool.pruned_subtrees += 1
+
+    def memory_stats(self):
+        stats = self.node_pool.stats()
+        stats["training_samples"] = len(self.training_data)
+        stats.update(self.training_data.stats())
+        return stats
+
+    def collect_leaves(self, root, count, boards=None):
+        # Selects up to `count` distinct leaves, steering later selections away with virtual loss
+        leaves = []
+        self.pending_leaves = leaves
+        for _ in range(count):
+            leaf = self.selection(root, None if boards is None else boards[len(leaves)])
+            if any(leaf is pending for pending in leaves):
+                break  # Tree too narrow for more distinct leaves right now
+            leaves.append(leaf)
+            if count > 1:
+                self.apply_virtual_loss(leaf, 1)
+        if count > 1:
+            for leaf in leaves:
+                self.apply_virtual_loss(leaf, -1)
+        self.pending_leaves = []
+        return leaves
+
+    def apply_virtual_loss(self, node, sign):
+        while node:
+            node.visits += sign
+            node.value -= sign * self.virtual_loss
+            node = node.parent
+
+    def evaluate_leaves(self, leaves, boards=None):
+        # Finished games are scored exactly, every other leaf goes through one batched value network call.
+        # boards: the rows selection filled for these leaves; leaves that didn't come from selection are rebuilt
+        if boards is None:
+            boards = np.array([leaf.state.reshape(-1) for leaf in leaves], dtype=np.float32).reshape(len(leaves), -1)
+        value_estimates = [None] * len(leaves)
+        states = boards.reshape(len(leaves), DIMENSION, DIMENSION)  # Views of the rows, no copies
+        pending = []
+        for index, leaf in enumerate(leaves):
+            if self.use_solver and self.board.who_wins(states[index]) != 2:
+                value_estimates[index] = self.simulation(leaf, states[index])
+            else:
+                pending.append(index)
+
+        if pending and self.policy_table is not None:
+            batch_values = self.policy_table.values_batch([states[index] for index in pending])
+            for index, value_estimate in zip(pending, batch_values):
+                value_estimates[index] = value_estimate
+        elif pending:
+            state_tensor = torch.from_numpy(boards[pending])
+            with torch.no_grad():
+                batch_values = self.value_net(state_tensor).squeeze(1).tolist()
+            for index, value_estimate in zip(pending, batch_values):
+                value_estimates[index] = value_estimate
+
+        if pending and self.use_priors and self.prefetch_leaf_priors:
+            needs_policy = [index for index in pending if leaves[index].policy is None]
+            if needs_policy:
+                for index, policy_values in zip(needs_policy, self.get_policy_values_batch([states[index] for index in needs_policy])):
+                    leaves[index].policy = policy_values
+        return value_estimates
+
+    def simulation(self, node, state=None):
+        if state is None:
+            state = node.state
+
+        # Finished games are scored exactly and marked as solved
+        if self.use_solver and self.board.who_wins(state) != 2:
+            node.proven = self.board.outcome_for(state, node.player)
+            return node.proven
+
+        if self.policy_table is not None:
+            return self.policy_table.value(state)
+
         # Convert the state to tensor and get the value estimate
-        state_tensor = torch.tensor(node.state.flatten(), dtype=torch.float32).unsqueeze(0)
+        state_tensor = torch.tensor(state.flatten(), dtype=torch.float32).unsqueeze(0)
         with torch.no_grad():
             value_estimate = self.value_net(state_tensor)
         return value_estimate.item()
 
+    def rave_schedule(self):
+        return self.rave_equivalence if self.use_rave else None
+
     def backpropogation(self, node, value_estimate):
+        played_moves = set()  # (move, player) pairs made below the current node in this simulation
         while node:
             node.visits += 1
             node.value += value_estimate
+            if self.use_solver and node.proven is None:
+                node.proven = self.solve_node(node)
+            if self.use_rave:
+                for child in node.children:
+                    if (child.move, child.player) in played_moves:
+                        child.amaf_visits += 1
+                        child.amaf_value -= value_estimate  # Children belong to the opponent
+                if node.move is not None:
+                    played_moves.add((node.move, node.player))
             value_estimate = -value_estimate  # Switch value estimate for the opponent
             node = node.parent
 
-    def choose_node_with_policy(self, node, policy_values):
+    def solve_node(self, node):
+        # Outcome for node.player once its children (the opponent's replies) decide it
+        if not node.children:
+            return None
+        child_results = [child.proven for child in node.children]
+        if 1 in child_results:  # Opponent has a reply that wins
+            return -1
+        if None in child_results:
+            return None
+        if 0 in child_results:  # Best the opponent can do is a draw
+            return 0
+        return 1  # Every reply loses for the opponent
+
+    def choose_node_with_policy(self, node):
+        # PUCT: value estimate plus an exploration bonus scaled by the child's own prior
         best_score = float('-inf')
         best_node = None
-        for child, policy_value in zip(node.children, policy_values):
-            if child.visits > 0:
-                ucb = child.value / child.visits + 2 * math.sqrt((math.log(node.visits)) / child.visits)
-                combined_score = ucb * policy_value
-            else:
-                combined_score = policy_value  # If unvisited, rely solely on policy network
+        rave_equivalence = self.rave_schedule()
+        sqrt_visits = math.sqrt(max(node.visits, 1))
+        for child in node.children:
+            if child.proven is not None:  # Solved subtrees need no more simulations
+                continue
+            value = child.mean_value(rave_equivalence) if child.visits > 0 else 0
+            combined_score = value + self.c_puct * child.prior * sqrt_visits / (1 + child.visits)
             if combined_score > best_score:
                 best_score = combined_score
                 best_node = child
-        if best_node is None:  # If no node was chosen, choose a random child
-            best_node = random.choice(node.children)
+        if best_node is None:  # If no node was chosen, choose a random unsolved child
+            unsolved = [child for child in node.children if child.proven is None]
+            best_node = random.choice(unsolved or node.children)
         return best_node
 
 
     def get_policy_values(self, state):
+        if self.policy_table is not None:
+            return self.policy_table.policy_values(state)
         state_tensor = torch.tensor(state[np.newaxis, :], dtype=torch.long)
         if next(self.model.parameters()).is_cuda:
             state_tensor = state_tensor.cuda()
         policy_distribution = self.model(state_tensor)
         return F.softmax(policy_distribution, dim=-1).detach().cpu().numpy().flatten()
 
+    def get_policy_values_batch(self, states):
+        # One policy network call for several root states, one row of move probabilities per state
+        if self.policy_table is not None:
+            return self.policy_table.policy_values_batch(states)
+        state_tensor = torch.tensor(np.array(states), dtype=torch.long)
+        if next(self.model.parameters()).is_cuda:
+            state_tensor = state_tensor.cuda()
+        with torch.no_grad():
+            policy_distribution = self.model(state_tensor)
+        return F.softmax(policy_distribution, dim=-1).cpu().numpy()
+
+    def search_policy(self, best_child_node):
+        # Policy target for the searched root position, the state self-play stores next to it, over the root's
+        # moves: the book's stored distribution, the Gumbel improved policy or the root visit distribution.
+        # None (no policy target) when no root move has been visited
+        root = best_child_node.parent
+        if root.book_policy is not None:  # Book hit: the stored deep search is the target
+            return list(root.book_policy)
+        if root.gumbel is not None:
+            return root.gumbel.improved_policy()
+        policy = self.get_mcts_policy(root)
+        return policy if any(policy) else None
+
     def get_mcts_policy(self, starting_node):
         total_visits = sum(child.visits for child in starting_node.children)
         policy = [0] * (DIMENSION * DIMENSION)
+        if total_visits == 0:  # Children whose first evaluation is still pending in the batch
+            return policy
         for child in starting_node.children:
             index = child.move[0] * DIMENSION + child.move[1]
             policy[index] = child.visits / total_visits
@@ -267,19 +677,40 @@ class MCTS:
         log_probs = F.log_softmax(predicted_policy, dim=-1)
         return -torch.sum(mcts_policy * log_probs)
     
-    def train_networks(self, num_epochs):
-        self.training_data = [sample for sample in self.training_data if sample[2] is not None]
+    def train_networks(self, num_epochs, shard=None):
+        # shard: (rank, world_size) when data-parallel ranks split the set (see distributed_train.py)
+        samples = [sample for sample in self.training_data if sample[2] is not None]
+        if isinstance(self.training_data, SampleStore) and self.spilled_training_shards != 0:
+            samples += self.training_data.spilled(self.spilled_training_shards)
+        if self.deduplicate_training:
+            training_set = aggregate_samples(samples)
+            print(f"Training on {len(training_set)} unique positions from {len(samples)} samples")
+        else:
+            training_set = [(state, policy, value, 1, 1 if policy is not None else 0) for state, policy, value in samples]
+
+        # Duplicate counts become loss weights, scaled to average 1 so step sizes match a plain epoch
+        value_scale = len(training_set) / max(sum(sample[3] for sample in training_set), 1)
+        policy_samples = [sample[4] for sample in training_set if sample[4]]
+        policy_scale = len(policy_samples) / max(sum(policy_samples), 1)
+
+        if shard is not None:
+            # Every rank takes the same number of steps, the last positions wrap around to fill the shorter shards
+            rank, world_size = shard
+            steps = math.ceil(len(training_set) / world_size)
+            training_set = [training_set[(rank + world_size * step) % len(training_set)] for step in range(steps)]
 
         for epoch in tqdm(range(num_epochs)):
             total_loss = 0
-            for state, mcts_policy, true_value in self.training_data:
+            for state, mcts_policy, true_value, value_count, policy_count in training_set:
                 self.model.optimizer.zero_grad()
                 
-                # For policy
-                state_tensor = torch.tensor(state.flatten(), dtype=torch.long).unsqueeze(0)
-                mcts_policy_tensor = torch.tensor(mcts_policy, dtype=torch.float32).unsqueeze(0)
-                predicted_policy = self.model(state_tensor)
-                policy_loss = self.compute_policy_loss(predicted_policy, mcts_policy_tensor)
+                # For policy, positions from fast searches have no policy target
+                policy_loss = 0
+                if mcts_policy is not None:
+                    state_tensor = torch.tensor(state.flatten(), dtype=torch.long).unsqueeze(0)
+                    mcts_policy_tensor = torch.tensor(mcts_policy, dtype=torch.float32).unsqueeze(0)
+                    predicted_policy = self.model(state_tensor)
+                    policy_loss = self.compute_policy_loss(predicted_policy, mcts_policy_tensor)
                 
                 # For value
                 state_tensor = torch.tensor(state.flatten(), dtype=torch.float32).unsqueeze(0)
@@ -287,13 +718,13 @@ class MCTS:
                 predicted_value = self.value_net(state_tensor)
                 value_loss = F.mse_loss(predicted_value, true_value_tensor)
                 
-                loss = policy_loss + value_loss
+                loss = policy_count * policy_scale * policy_loss + value_count * value_scale * value_loss
                 loss.backward()
                 self.model.optimizer.step()
                 
                 total_loss += loss.item()
 
-            print(f"Epoch {epoch + 1}/{num_epochs}, Loss: {total_loss / len(self.training_data)}")
+            print(f"Epoch {epoch + 1}/{num_epochs}, Loss: {total_loss / len(training_set)}")
 
 
     def self_play(self, num_games=100):
@@ -301,26 +732,44 @@ class MCTS:
             state = np.zeros((DIMENSION, DIMENSION))
             game_history = []
             player = 1
+            resign_game = self.resignation.new_game() if self.resignation is not None else None
+            winner = None
 
             while self.board.who_wins(state) == 2:
-                best_child_node = self.search(state, player)
-                mcts_policy = self.get_mcts_policy(best_child_node)  # Pass node instead of state
+                full_search = random.random() < self.full_search_fraction
+                best_child_node = self.search(state, player, full_search)
+                mcts_policy = self.search_policy(best_child_node) if full_search else None  # Fast searches only give a value target
                 game_history.append((state, mcts_policy, None))  # 'None' is a placeholder for the reward.
+
+                if resign_game is not None:
+                    winner = self.resignation.check(resign_game, state, player, move_value(best_child_node))
+                    if winner is not None:
+                        break
                     
                 state = best_child_node.state  # Extract the state from the best child node
                 player = 3 - player  # Switch player
 
-                    
-            winner = self.board.who_actually_wins(state)
-            # Assign rewards based on the game outcome
-            for index, (s, p, r) in enumerate(game_history):
-                if winner == 0:  # Draw
-                    reward = 0
-                else:
-                    reward = winner if index % 2 == 0 else -winner
-                game_history[index] = (s, p, reward)
-
-            self.training_data += game_history
+            if resign_game is not None:
+                self.resignation.finish(resign_game, winner if winner is not None else self.board.who_actually_wins(state))
+            self.training_data += self.assign_game_rewards(game_history, state, winner)
+
+        if self.budget_scheduler is not None:
+            print(f"Simulation budget: {self.budget_scheduler.report(num_games)}")
+        if self.resignation is not None:
+            print(f"Resignation: {self.resignation.report()}")
+
+    def assign_game_rewards(self, game_history, final_state, winner=None):
+        # winner is given for resigned or adjudicated games, final_state decides otherwise
+        if winner is None:
+            winner = self.board.who_actually_wins(final_state)
+        # Assign rewards based on the game outcome
+        for index, (s, p, r) in enumerate(game_history):
+            if winner == 0:  # Draw
+                reward = 0
+            else:
+                reward = winner if index % 2 == 0 else -winner
+            game_history[index] = (s, p, reward)
+        return game_history
 
 
 
@@ -15,7 +15,10 @@ class TicTacToeTransformerSeq(nn.Module):
         x = self.embedding(x)  
         x = x.view(x.size(0), x.size(1), -1, x.size(-1))  # Adjusting shape to (batch_size, sequence_length, board_dim * board_dim, emb_dim)
         x = x.mean(dim=2)  # Mean or max pooling can be used here
-        x = self.transformer(x)
+        # The encoder is sequence-first, so each row goes in as its own length-1 sequence;
+        # that keeps every board independent of the rest of the batch
+        batch_size, rows = x.size(0), x.size(1)
+        x = self.transformer(x.reshape(1, batch_size * rows, -1)).view(batch_size, rows, -1)
         x = x.mean(dim=1)  # Aggregating over sequence length
         x = self.fc(x)
         return x
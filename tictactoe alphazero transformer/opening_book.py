@@ -0,0 +1,131 @@
+import argparse
+import hashlib
+import json
+import os
+import numpy as np
+from constants import DIMENSION
+from mcts_code import Board
+from symmetry import CELLS, canonical_form
+from reanalyse import player_to_move
+
+# Opening book: deep-search results (root visit distribution, per-move values) for the first plies,
+# stored on disk per model version and keyed by the canonical board under the 8 symmetries of the square.
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.json")
+
+board = Board()
+
+def model_version(mcts):
+    digest = hashlib.sha256()
+    for network in [mcts.model, mcts.value_net]:
+        for name, tensor in network.state_dict().items():
+            digest.update(name.encode())
+            digest.update(tensor.detach().cpu().numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def opening_positions(plies):
+    # Canonical positions with fewer than `plies` moves played that are still in progress
+    positions = {}
+    frontier = [np.zeros((DIMENSION, DIMENSION))]
+    for ply in range(plies):
+        next_frontier = []
+        for state in frontier:
+            code, _ = canonical_form(state)
+            if code in positions or board.who_wins(state) != 2:
+                continue
+            positions[code] = state
+            player = player_to_move(state)
+            for row, column in zip(*np.where(state == 0)):
+                next_state = state.copy()
+                next_state[row][column] = player
+                next_frontier.append(next_state)
+        frontier = next_frontier
+    return list(positions.values())
+
+class OpeningBook:
+    def __init__(self, path=None, max_versions=3):
+        self.path = path
+        self.max_versions = max_versions  # Model versions kept on disk, the least recently built are dropped
+        self.entries = {}  # model version -> canonical code (str) -> entry, oldest version first
+        self.version = None
+        self.hits = 0
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def attach(self, mcts):
+        # Lookups only use entries searched with the current weights; call again after training
+        self.version = model_version(mcts)
+        mcts.opening_book = self
+
+    def save(self, path=None):
+        path = path or self.path
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(temporary_path, path)
+
+    def lookup(self, state, player):
+        if player != player_to_move(state):
+            return None
+        code, permutation = canonical_form(state)
+        entry = self.entries.get(self.version, {}).get(str(code))
+        if entry is None:
+            return None
+        self.hits += 1
+        # Stored in canonical coordinates, map back onto this board's cells
+        policy, q = [0.0] * CELLS, [0.0] * CELLS
+        for canonical_index, index in enumerate(permutation):
+            policy[index] = entry["policy"][canonical_index]
+            q[index] = entry["q"][canonical_index]
+        return {"policy": policy, "q": q, "visits": entry["visits"], "value": entry["value"]}
+
+    def build(self, mcts, plies=3, search_length=2000):
+        # Deep searches of every opening position not yet in the book for the current model version
+        self.attach(mcts)
+        version_entries = self.entries.pop(self.version, {})  # Re-inserted last, so it counts as the newest
+        self.entries[self.version] = version_entries
+        while len(self.entries) > self.max_versions:
+            del self.entries[next(iter(self.entries))]
+        saved = (mcts.search_length, mcts.opening_book)
+        mcts.search_length, mcts.opening_book = search_length, None
+
+        for state in opening_positions(plies):
+            code, permutation = canonical_form(state)
+            if str(code) in version_entries:
+                continue
+            mcts.search(state.copy(), player_to_move(state))
+            root = mcts.last_root
+            policy = mcts.get_mcts_policy(root)
+            q = [0.0] * CELLS
+            for child in root.children:
+                if child.visits > 0:
+                    q[child.move[0] * DIMENSION + child.move[1]] = child.value / child.visits
+            version_entries[str(code)] = {
+                "policy": [policy[index] for index in permutation],
+                "q": [q[index] for index in permutation],
+                "visits": sum(child.visits for child in root.children),
+                "value": -root.value / root.visits,  # From the mover's point of view
+            }
+
+        mcts.search_length, mcts.opening_book = saved
+        mcts.opening_book = self
+        return len(version_entries)
+
+if __name__ == "__main__":
+    from arena import make_mcts
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plies", type=int, default=3)
+    parser.add_argument("--search-length", type=int, default=2000)
+    parser.add_argument("--model-weights", default=None)
+    parser.add_argument("--value-weights", default=None)
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    parser.add_argument("--max-versions", type=int, default=3)
+    args = parser.parse_args()
+
+    mcts = make_mcts(args.search_length, args.model_weights, args.value_weights)
+    book = OpeningBook(args.output, args.max_versions)
+    count = book.build(mcts, args.plies, args.search_length)
+    book.save()
+    print(f"{count} positions for model {book.version} in {args.output}")
@@ -0,0 +1,224 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import torch
+from constants import DIMENSION
+from model import TicTacToeTransformerSeq
+from mcts_code import MCTS, Board
+from lockstep import lockstep_search
+from policy_table import choose_policy_move
+
+# Asyncio move server. Clients send one JSON object per line:
+#   {"board": [[0, 0, 0], [0, 1, 0], [0, 0, 0]], "player": 2, "mode": "policy" | "mcts"}
+# and get back {"move": [row, column]} (null once the game is over). {"type": "stats"} returns metrics.
+# Requests arriving within window_ms are answered with one batched policy call or one lockstep MCTS run.
+
+board = Board()
+
+class ServerMetrics:
+    def __init__(self, max_samples=100000):
+        # Throughput is taken over the span from the first request received to the last one answered,
+        # so time the server spent idle before (or after) the traffic does not dilute it
+        self.first_received = None
+        self.last_answered = None
+        self.requests = 0
+        self.batches = 0
+        self.latencies = []
+        self.max_samples = max_samples
+
+    def record_batch(self, received, answered):
+        latencies = [answered - start for start in received]
+        if self.first_received is None:
+            self.first_received = min(received)
+        self.last_answered = answered
+        self.batches += 1
+        self.requests += len(latencies)
+        self.latencies.extend(latencies)
+        if len(self.latencies) > self.max_samples:
+            self.latencies = self.latencies[-self.max_samples:]
+
+    def summary(self):
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        elapsed = self.last_answered - self.first_received if self.requests else 0.0
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / max(self.batches, 1),
+            "throughput_per_second": self.requests / elapsed if elapsed > 0 else 0.0,
+            "latency_ms_p50": float(np.percentile(latencies, 50)),
+            "latency_ms_p95": float(np.percentile(latencies, 95)),
+            "latency_ms_p99": float(np.percentile(latencies, 99)),
+        }
+
+class MicroBatcher:
+    def __init__(self, mcts, window_ms=3, max_batch=256):
+        self.mcts = mcts
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1)  # Model and search tree are used from one thread only
+        self.metrics = ServerMetrics()
+
+    async def best_move(self, state, player, mode):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((state, player, mode, future, time.perf_counter()))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                moves = await loop.run_in_executor(self.executor, self.evaluate, batch)
+            except Exception as error:
+                for *_, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+
+            finished = time.perf_counter()
+            for (_, _, _, future, received), move in zip(batch, moves):
+                if not future.done():
+                    future.set_result(move)
+            self.metrics.record_batch([received for *_, received in batch], finished)
+
+    def evaluate(self, batch):
+        moves = [None] * len(batch)
+        policy_requests = [index for index, item in enumerate(batch) if item[2] == "policy"]
+        mcts_requests = [index for index, item in enumerate(batch) if item[2] == "mcts"]
+
+        if policy_requests:
+            policies = self.mcts.get_policy_values_batch([batch[index][0] for index in policy_requests])
+            for index, policy_values in zip(policy_requests, policies):
+                moves[index] = choose_policy_move(policy_values, batch[index][0], batch[index][1])
+        if mcts_requests:
+            positions = [(batch[index][0], batch[index][1]) for index in mcts_requests]
+            for index, move in zip(mcts_requests, lockstep_search(self.mcts, positions)):
+                moves[index] = move
+        return moves
+
+def parse_request(request):
+    state = np.array(request["board"], dtype=float)
+    if state.shape != (DIMENSION, DIMENSION) or not np.isin(state, [0, 1, 2]).all():
+        raise ValueError(f"board must be {DIMENSION}x{DIMENSION} with cells 0, 1 or 2")
+    player = int(request.get("player", 1))
+    if player not in (1, 2):
+        raise ValueError("player must be 1 or 2")
+    mode = request.get("mode", "policy")
+    if mode not in ("policy", "mcts"):
+        raise ValueError("mode must be 'policy' or 'mcts'")
+    return state, player, mode
+
+async def handle_client(batcher, reader, writer):
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+                if request.get("type") == "stats":
+                    reply = batcher.metrics.summary()
+                else:
+                    state, player, mode = parse_request(request)
+                    if board.who_wins(state) != 2:
+                        reply = {"move": None}
+                    else:
+                        move = await batcher.best_move(state, player, mode)
+                        reply = {"move": [int(move[0]), int(move[1])] if move is not None else None}
+            except (ValueError, KeyError, TypeError) as error:
+                reply = {"error": str(error)}
+            writer.write((json.dumps(reply) + "\n").encode())
+            await writer.drain()
+    except ConnectionResetError:
+        pass
+    finally:
+        writer.close()
+
+async def serve(mcts, host, port, window_ms, max_batch):
+    batcher = MicroBatcher(mcts, window_ms, max_batch)
+    batch_task = asyncio.create_task(batcher.run())
+    server = await asyncio.start_server(lambda reader, writer: handle_client(batcher, reader, writer), host, port)
+    print(f"Serving moves on {host}:{port}")
+    async with server:
+        try:
+            await server.serve_forever()
+        finally:
+            batch_task.cancel()
+
+async def bench_client(host, port, games, mode):
+    # Plays `games` games against a random opponent through the server
+    reader, writer = await asyncio.open_connection(host, port)
+    requests = 0
+    for game in range(games):
+        state = np.zeros((DIMENSION, DIMENSION))
+        server_player = 1 if game % 2 == 0 else 2
+        player = 1
+        while board.who_wins(state) == 2:
+            if player == server_player:
+                writer.write((json.dumps({"board": state.tolist(), "player": player, "mode": mode}) + "\n").encode())
+                await writer.drain()
+                move = json.loads(await reader.readline())["move"]
+                requests += 1
+            else:
+                move = random.choice(list(zip(*np.where(state == 0))))
+            state[move[0]][move[1]] = player
+            player = 3 - player
+    writer.close()
+    return requests
+
+async def bench(host, port, clients, games, mode):
+    start = time.perf_counter()
+    counts = await asyncio.gather(*[bench_client(host, port, games, mode) for _ in range(clients)])
+    elapsed = time.perf_counter() - start
+    print(f"{clients} clients, {sum(counts)} requests in {elapsed:.2f}s ({sum(counts) / elapsed:.0f} requests/s)")
+
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"type": "stats"}\n')
+    await writer.drain()
+    print(json.dumps(json.loads(await reader.readline()), indent=2))
+    writer.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["serve", "bench"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--window-ms", type=float, default=3)
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--search-length", type=int, default=100)
+    parser.add_argument("--model-weights", default=None)
+    parser.add_argument("--value-weights", default=None)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--games", type=int, default=5)
+    parser.add_argument("--mode", choices=["policy", "mcts"], default="policy")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        model = TicTacToeTransformerSeq()
+        if args.model_weights:
+            model.load_state_dict(torch.load(args.model_weights))
+        model.eval()
+        mcts = MCTS(model)
+        if args.value_weights:
+            mcts.value_net.load_state_dict(torch.load(args.value_weights))
+        mcts.search_length = args.search_length
+        asyncio.run(serve(mcts, args.host, args.port, args.window_ms, args.max_batch))
+    else:
+        asyncio.run(bench(args.host, args.port, args.clients, args.games, args.mode))
@@ -0,0 +1,156 @@
+import argparse
+import random
+import numpy as np
+import tictactoe
+from constants import DIMENSION
+
+# Ahead-of-time compiled networks: policy logits and value estimates for every reachable position,
+# stored in dense arrays indexed by the base-3 board code. Loading and querying a table only needs numpy.
+
+CELLS = DIMENSION * DIMENSION
+TABLE_SIZE = 3 ** CELLS
+POWERS = 3 ** np.arange(CELLS, dtype=np.int64)
+
+def board_code(state):
+    return int(np.dot(np.asarray(state, dtype=np.int64).reshape(-1), POWERS))
+
+def board_codes(states):
+    return np.asarray(states, dtype=np.int64).reshape(len(states), CELLS) @ POWERS
+
+def is_terminal(state):
+    return tictactoe.winningState(state, DIMENSION) or tictactoe.fullBoard(state, DIMENSION)
+
+def reachable_positions():
+    # Every position reachable from the empty board with player 1 moving first, finished games included
+    positions = {}
+    stack = [(np.zeros((DIMENSION, DIMENSION)), 1)]
+    while stack:
+        state, player = stack.pop()
+        code = board_code(state)
+        if code in positions:
+            continue
+        positions[code] = state
+        if is_terminal(state):
+            continue
+        for row, column in zip(*np.where(state == 0)):
+            next_state = state.copy()
+            next_state[row][column] = player
+            stack.append((next_state, 3 - player))
+    return positions
+
+class PolicyTable:
+    def __init__(self, logits, values, reachable):
+        self.logits = logits
+        self.values = values
+        self.reachable = reachable
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data["logits"], data["values"], data["reachable"])
+
+    def save(self, path):
+        np.savez_compressed(path, logits=self.logits, values=self.values, reachable=self.reachable)
+
+    def lookup_logits(self, state):
+        return self.logits[board_code(state)]
+
+    def policy_values(self, state):
+        # Softmax of the stored logits, same as MCTS.get_policy_values on the model
+        logits = self.lookup_logits(state)
+        exponentials = np.exp(logits - logits.max())
+        return exponentials / exponentials.sum()
+
+    def policy_values_batch(self, states):
+        logits = self.logits[board_codes(states)]
+        exponentials = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exponentials / exponentials.sum(axis=1, keepdims=True)
+
+    def value(self, state):
+        return float(self.values[board_code(state)])
+
+    def values_batch(self, states):
+        return self.values[board_codes(states)].tolist()
+
+def compile_policy_table(model, value_net):
+    # Evaluates both networks once on every reachable position (in eval mode, so dropout is off)
+    import torch
+
+    positions = reachable_positions()
+    codes = np.array(list(positions.keys()), dtype=np.int64)
+    states = np.array(list(positions.values()))
+
+    model_was_training, value_was_training = model.training, value_net.training
+    model.eval()
+    value_net.eval()
+    with torch.no_grad():
+        logits = model(torch.tensor(states, dtype=torch.long)).cpu().numpy()
+        values = value_net(torch.tensor(states.reshape(len(states), CELLS), dtype=torch.float32)).squeeze(1).cpu().numpy()
+    model.train(model_was_training)
+    value_net.train(value_was_training)
+
+    table = PolicyTable(
+        np.zeros((TABLE_SIZE, CELLS), dtype=np.float32),
+        np.zeros(TABLE_SIZE, dtype=np.float32),
+        np.zeros(TABLE_SIZE, dtype=bool),
+    )
+    table.logits[codes] = logits
+    table.values[codes] = values
+    table.reachable[codes] = True
+    return table
+
+def choose_policy_move(scores, state, player):
+    # Player 1 takes the highest-scoring legal move, player 2 the lowest (as in play.py)
+    valid_moves = [row * DIMENSION + column for row, column in zip(*np.where(np.asarray(state) == 0))]
+    if not valid_moves:
+        return None
+    if player == 1:
+        index = max(valid_moves, key=lambda move: scores[move])
+    else:
+        index = min(valid_moves, key=lambda move: scores[move])
+    return (index // DIMENSION, index % DIMENSION)
+
+class TableAgent:
+    def __init__(self, table):
+        self.table = table
+
+    def __call__(self, state, player):
+        return choose_policy_move(self.table.lookup_logits(state), state, player)
+
+def play_table_vs_random(table, table_as_player):
+    agent = TableAgent(table)
+    boardState = tictactoe.emptyTable.copy()
+    player = 1
+
+    while not is_terminal(boardState):
+        if player == table_as_player:
+            move = agent(boardState, player)
+        else:
+            possible_moves = list(zip(*np.where(boardState == 0)))
+            move = random.choice(possible_moves)
+        boardState[move] = player
+        player = 3 - player
+
+        print("--")
+        tictactoe.printFormmating(boardState)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-weights", required=True)
+    parser.add_argument("--value-weights", default=None)
+    parser.add_argument("--output", default="policy_table.npz")
+    args = parser.parse_args()
+
+    import torch
+    from model import TicTacToeTransformerSeq
+    from mcts_code import ValueNet
+
+    model = TicTacToeTransformerSeq()
+    model.load_state_dict(torch.load(args.model_weights))
+    value_net = ValueNet()
+    if args.value_weights:
+        value_net.load_state_dict(torch.load(args.value_weights))
+
+    table = compile_policy_table(model, value_net)
+    table.save(args.output)
+    print(f"Compiled {int(table.reachable.sum())} positions into {args.output}")
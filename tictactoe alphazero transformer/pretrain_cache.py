@@ -0,0 +1,110 @@
+from constants import DIMENSION
+from collections import deque
+import contextlib
+import hashlib
+import inspect
+import json
+import os
+import random
+import numpy as np
+import torch
+from train import train_model
+from model import TicTacToeTransformerSeq
+from game_logic import generate_random_games, make_random_move, assign_rewards
+import batch_sampler
+import symmetry
+import training_set
+
+# Pretraining (random games + train_model) runs with random, numpy and torch seeded from its configuration,
+# so it is deterministic in the configuration; its dataset and weights are stored under
+# cache/<hash of the configuration> and reused by later runs.
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+def pretrain_config(num_games, buffer_size, num_epochs, batch_size, learning_rate):
+    # Source of the generator/trainer (and the modules train_model builds its batches with) is part of the key,
+    # so editing them invalidates the cache
+    source = "".join(inspect.getsource(code) for code in [generate_random_games, make_random_move, assign_rewards, train_model, TicTacToeTransformerSeq,
+                                                          training_set, symmetry, batch_sampler])
+    return {
+        "num_games": num_games,
+        "buffer_size": buffer_size,
+        "num_epochs": num_epochs,
+        "batch_size": batch_size,
+        "dimension": DIMENSION,
+        "learning_rate": learning_rate,
+        "source": hashlib.sha256(source.encode()).hexdigest(),
+    }
+
+def load_or_save_value_net(value_net, use_cache=True):
+    # MCTS starts its value net from fresh random weights; the first ones drawn are stored in cache/ and loaded
+    # by later launches, so whatever is keyed on the weights (the opening book) carries over between runs
+    source_hash = hashlib.sha256(inspect.getsource(type(value_net)).encode()).hexdigest()[:16]
+    weights_path = os.path.join(CACHE_DIR, f"value_net_{source_hash}.pth")
+    if use_cache and os.path.exists(weights_path):
+        value_net.load_state_dict(torch.load(weights_path))
+        return value_net
+    if use_cache:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        torch.save(value_net.state_dict(), weights_path + ".tmp")
+        os.replace(weights_path + ".tmp", weights_path)
+    return value_net
+
+def config_hash(config):
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+@contextlib.contextmanager
+def seeded(seed):
+    # Seeds random, numpy and torch for the block and gives the caller its own random streams back afterwards
+    python_state, numpy_state = random.getstate(), np.random.get_state()
+    random.seed(seed)
+    np.random.seed(seed)
+    try:
+        with torch.random.fork_rng(devices=[]):
+            torch.manual_seed(seed)
+            yield
+    finally:
+        random.setstate(python_state)
+        np.random.set_state(numpy_state)
+
+def save_buffer(path, buffer):
+    boards = np.array([experience[0] for experience in buffer])
+    moves = np.array([experience[1] for experience in buffer], dtype=np.int64)
+    rewards = np.array([experience[2] for experience in buffer], dtype=np.float64)
+    temporary_path = path + ".tmp.npz"
+    np.savez_compressed(temporary_path, boards=boards, moves=moves, rewards=rewards)
+    os.replace(temporary_path, path)
+
+def load_buffer(path, buffer_size):
+    data = np.load(path)
+    buffer = deque(maxlen=buffer_size)
+    for board, move, reward in zip(data["boards"], data["moves"], data["rewards"]):
+        buffer.append((board, (int(move[0]), int(move[1])), float(reward)))
+    return buffer
+
+def load_or_pretrain(num_games=10000, buffer_size=10000, num_epochs=100, batch_size=32, learning_rate=0.001, use_cache=True):
+    config = pretrain_config(num_games, buffer_size, num_epochs, batch_size, learning_rate)
+    cache_path = os.path.join(CACHE_DIR, config_hash(config))
+    buffer_path = os.path.join(cache_path, "replay_buffer.npz")
+    weights_path = os.path.join(cache_path, "model.pth")
+
+    if use_cache and os.path.exists(buffer_path) and os.path.exists(weights_path):
+        print(f"Loading pretrained model from {cache_path}")
+        model = TicTacToeTransformerSeq()
+        model.load_state_dict(torch.load(weights_path))
+        return load_buffer(buffer_path, buffer_size), model
+
+    with seeded(int(config_hash(config), 16) % 2**32):
+        model = TicTacToeTransformerSeq()
+        replay_buffer = deque(maxlen=buffer_size)
+        generate_random_games(num_games, replay_buffer)
+        model = train_model(model, replay_buffer, num_epochs=num_epochs, batch_size=batch_size, learning_rate=learning_rate)
+
+    if use_cache:
+        os.makedirs(cache_path, exist_ok=True)
+        save_buffer(buffer_path, replay_buffer)
+        torch.save(model.state_dict(), weights_path + ".tmp")
+        os.replace(weights_path + ".tmp", weights_path)
+        with open(os.path.join(cache_path, "config.json"), "w") as f:
+            json.dump(config, f, indent=2)
+    return replay_buffer, model
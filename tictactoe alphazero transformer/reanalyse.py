@@ -0,0 +1,108 @@
+import multiprocessing
+import queue
+import random
+import time
+import numpy as np
+import torch
+from model import TicTacToeTransformerSeq
+from mcts_code import MCTS
+
+# Reanalyse: a background process re-runs search on stored self-play positions with the latest weights
+# and sends back fresh policy/value targets, which are written into MCTS.training_data in place.
+# compute_fraction throttles the worker: it sleeps so that it is busy that share of the time.
+
+def player_to_move(state):
+    return 1 if np.count_nonzero(state == 1) == np.count_nonzero(state == 2) else 2
+
+def reanalyse_position(mcts, state):
+    player = player_to_move(state)
+    best_child = mcts.search(state.copy(), player)
+    policy = mcts.search_policy(best_child)  # Same policy target self_play records
+    value = -mcts.last_root.value / mcts.last_root.visits  # Root average, from the mover's point of view
+    return policy, value
+
+def reanalyse_worker(task_queue, result_queue, search_length, compute_fraction):
+    torch.set_num_threads(1)
+    mcts = MCTS(TicTacToeTransformerSeq())
+    mcts.search_length = search_length
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        if task[0] == "weights":
+            mcts.model.load_state_dict(task[1])
+            mcts.value_net.load_state_dict(task[2])
+            continue
+
+        _, key, state = task
+        start = time.perf_counter()
+        policy, value = reanalyse_position(mcts, state)
+        mcts.training_data.clear()  # The worker's own search samples are not needed
+        result_queue.put((key, state, policy, value))
+        busy = time.perf_counter() - start
+        time.sleep(busy * (1 - compute_fraction) / compute_fraction)
+
+class Reanalyser:
+    def __init__(self, mcts, compute_fraction=0.25, search_length=None, value_mix=0.5, max_pending=64):
+        if not 0 < compute_fraction <= 1:
+            raise ValueError("compute_fraction must be in (0, 1], the share of time the worker is busy")
+        self.mcts = mcts
+        self.compute_fraction = compute_fraction
+        self.search_length = search_length or mcts.search_length
+        self.value_mix = value_mix  # Weight of the reanalysed value against the stored target
+        self.max_pending = max_pending
+        self.pending = 0
+        self.refreshed = 0
+
+        # fork keeps the worker from re-importing main.py, which has no __main__ guard
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self.task_queue = context.Queue()
+        self.result_queue = context.Queue()
+        self.process = context.Process(
+            target=reanalyse_worker,
+            args=(self.task_queue, self.result_queue, self.search_length, compute_fraction),
+            daemon=True,
+        )
+
+    def start(self):
+        self.process.start()
+        self.sync_weights()
+
+    def sync_weights(self):
+        self.task_queue.put(("weights", self.mcts.model.state_dict(), self.mcts.value_net.state_dict()))
+
+    def submit(self):
+        # Keeps up to max_pending stored game positions queued for the worker
+        candidates = [entry[0] for entry in self.mcts.training_data if entry[2] is not None]
+        count = min(self.max_pending - self.pending, len(candidates))
+        for state in random.sample(candidates, max(count, 0)):
+            self.task_queue.put(("position", id(state), state))
+            self.pending += 1
+
+    def apply_updates(self):
+        # Entries are found by the identity of their state array, since training_data may have been
+        # filtered or extended since the position was submitted
+        positions = {id(entry[0]): index for index, entry in enumerate(self.mcts.training_data) if entry[2] is not None}
+        while True:
+            try:
+                key, state, policy, value = self.result_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            index = positions.get(key)
+            if index is None:
+                continue
+            stored_state, _, stored_value = self.mcts.training_data[index]
+            if not np.array_equal(stored_state, state):
+                continue
+            new_value = (1 - self.value_mix) * stored_value + self.value_mix * value
+            self.mcts.training_data[index] = (stored_state, policy, new_value)
+            self.refreshed += 1
+
+    def stop(self):
+        self.task_queue.put(None)
+        self.process.join(timeout=10)
+        if self.process.is_alive():
+            self.process.terminate()
@@ -0,0 +1,327 @@
+import argparse
+import io
+import json
+import multiprocessing
+import queue
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+import uuid
+import torch
+from model import TicTacToeTransformerSeq
+from mcts_code import MCTS
+from lockstep import lockstep_self_play
+from sample_store import encode_samples, decode_samples
+from core_scheduler import CoreScheduler, sync_threads_to_affinity
+
+# Remote self-play. Actors connect to the learner over TCP, pull the latest weights, play games with MCTS
+# and push compressed game records back. Every message is one frame:
+#   !II (header length, blob length) | JSON header | binary blob
+# Actor -> learner: get_weights {version}, push_games {worker, session, seq, games, version} + npz blob
+# Learner -> actor: weights {version} + torch blob, up_to_date, stop, ack, busy {retry_after}
+# The learner queues at most max_pending_batches pushes and answers "busy" beyond that; actors keep
+# unacknowledged records and reconnect with exponential backoff when the connection drops. A push whose
+# ack was lost is sent again, so every actor run (session) numbers its batches (seq) and the learner acks
+# batches it already queued without queuing them twice.
+
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+def send_frame(sock, header, blob=b""):
+    header_bytes = json.dumps(header).encode()
+    sock.sendall(struct.pack("!II", len(header_bytes), len(blob)) + header_bytes + blob)
+
+def recv_exact(sock, size):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+def recv_frame(sock):
+    header_length, blob_length = struct.unpack("!II", recv_exact(sock, 8))
+    if header_length + blob_length > MAX_FRAME_BYTES:
+        raise ConnectionError("frame too large")
+    header = json.loads(recv_exact(sock, header_length))
+    return header, recv_exact(sock, blob_length) if blob_length else b""
+
+def encode_weights(mcts):
+    buffer = io.BytesIO()
+    torch.save({"model": mcts.model.state_dict(), "value_net": mcts.value_net.state_dict()}, buffer)
+    return buffer.getvalue()
+
+def load_weights(mcts, blob):
+    weights = torch.load(io.BytesIO(blob), weights_only=True)
+    mcts.model.load_state_dict(weights["model"])
+    mcts.value_net.load_state_dict(weights["value_net"])
+
+class LearnerHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        learner = self.server.learner
+        learner.register(self.request)
+        try:
+            while True:
+                header, blob = recv_frame(self.request)
+                if header["type"] == "get_weights":
+                    if learner.stopping:
+                        send_frame(self.request, {"type": "stop"})
+                    elif learner.weights is None or header.get("version") == learner.version:
+                        send_frame(self.request, {"type": "up_to_date"})
+                    else:
+                        version, weights = learner.version, learner.weights
+                        send_frame(self.request, {"type": "weights", "version": version}, weights)
+                elif header["type"] == "push_games":
+                    if learner.queue_push(header, blob):
+                        send_frame(self.request, {"type": "ack"})
+                    else:
+                        send_frame(self.request, {"type": "busy", "retry_after": learner.retry_after})
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            learner.unregister(self.request)
+
+class LearnerServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+class Learner:
+    def __init__(self, host="0.0.0.0", port=9876, max_pending_batches=32, retry_after=0.5):
+        self.host, self.port = host, port
+        self.incoming = queue.Queue(maxsize=max_pending_batches)
+        self.retry_after = retry_after
+        self.weights = None
+        self.version = 0
+        self.stopping = False
+        self.server = None
+        self.clients = set()
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.busy_replies = 0
+        self.duplicate_batches = 0
+        self.last_seq = {}  # (worker, session) -> seq of the newest batch queued from that actor run
+        self.batches_received = 0
+        self.games_received = 0
+        self.versions_received = set()
+
+    def start(self, bind_attempts=20):
+        # Binding is retried briefly, a restarted learner may find the old socket still closing
+        for attempt in range(bind_attempts):
+            try:
+                self.server = LearnerServer((self.host, self.port), LearnerHandler)
+                break
+            except OSError:
+                if attempt == bind_attempts - 1:
+                    raise
+                time.sleep(0.5)
+        self.server.learner = self
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        # Also drops open connections, so actors go through their reconnect path
+        self.server.shutdown()
+        self.server.server_close()
+        with self.lock:
+            for client in list(self.clients):
+                try:
+                    client.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def register(self, client):
+        with self.lock:
+            self.clients.add(client)
+            self.connections += 1
+
+    def unregister(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    def queue_push(self, header, blob):
+        # False when the queue is full; a batch already queued once (resent after a lost ack) is only acked
+        actor = (header["worker"], header["session"])
+        with self.lock:
+            if header["seq"] <= self.last_seq.get(actor, -1):
+                self.duplicate_batches += 1
+                return True
+            try:
+                self.incoming.put_nowait((header, blob))
+            except queue.Full:
+                self.busy_replies += 1
+                return False
+            self.last_seq[actor] = header["seq"]
+            return True
+
+    def publish_weights(self, mcts):
+        self.weights = encode_weights(mcts)
+        self.version += 1
+
+    def drain(self, mcts=None):
+        # Decodes every queued push; samples are appended to mcts.training_data when given
+        samples = []
+        while True:
+            try:
+                header, blob = self.incoming.get_nowait()
+            except queue.Empty:
+                break
+            samples.extend(decode_samples(blob))
+            self.batches_received += 1
+            self.games_received += header["games"]
+            self.versions_received.add(header["version"])
+        if mcts is not None:
+            mcts.training_data += samples
+        return samples
+
+def run_actor(host, port, worker_id, num_batches, games_per_batch=8, search_length=50, concurrent_games=8, pinned=False):
+    # pinned: a CoreScheduler sets this actor's cores, its thread count follows them; one thread otherwise
+    torch.set_num_threads(1)
+    mcts = MCTS(TicTacToeTransformerSeq())
+    mcts.search_length = search_length
+    version, pending, sent, backoff = None, None, 0, 0.1
+    session, seq = uuid.uuid4().hex, 0  # seq numbers this run's batches, a resent batch keeps its number
+
+    while sent < num_batches:
+        try:
+            with socket.create_connection((host, port), timeout=60) as sock:
+                backoff = 0.1
+                while sent < num_batches:
+                    send_frame(sock, {"type": "get_weights", "version": version})
+                    header, blob = recv_frame(sock)
+                    if header["type"] == "stop":
+                        return sent
+                    if header["type"] == "weights":
+                        load_weights(mcts, blob)
+                        version = header["version"]
+
+                    if pending is None:
+                        if pinned:
+                            sync_threads_to_affinity()  # Follows the core share the CoreScheduler gave this actor
+                        mcts.training_data.clear()
+                        lockstep_self_play(mcts, games_per_batch, concurrent_games)
+                        pending = (encode_samples(mcts.training_data), version, seq)
+                        seq += 1
+
+                    blob, games_version, batch_seq = pending
+                    send_frame(sock, {"type": "push_games", "worker": worker_id, "session": session, "seq": batch_seq,
+                                      "games": games_per_batch, "version": games_version}, blob)
+                    header, _ = recv_frame(sock)
+                    if header["type"] == "ack":
+                        pending = None
+                        sent += 1
+                    elif header["type"] == "busy":
+                        time.sleep(header["retry_after"])
+        except (ConnectionError, OSError):
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 5.0)
+    return sent
+
+def run_learner(host, port, rounds, games_per_round, num_epochs=10):
+    # Central learner: trains on every games_per_round remote games and republishes the weights
+    mcts = MCTS(TicTacToeTransformerSeq())
+    learner = Learner(host, port)
+    learner.publish_weights(mcts)
+    learner.start()
+    print(f"Learner listening on {host}:{learner.port}")
+
+    for round_index in range(rounds):
+        target = learner.games_received + games_per_round
+        while learner.games_received < target:
+            learner.drain(mcts)
+            time.sleep(0.5)
+        print(f"\nRound {round_index + 1}/{rounds}: {learner.games_received} games received, training")
+        mcts.train_networks(num_epochs=num_epochs)
+        learner.publish_weights(mcts)
+
+    learner.stopping = True  # Actors get "stop" on their next weights request
+    time.sleep(learner.retry_after * 4)
+    learner.stop()
+    return mcts
+
+def loopback(num_workers=2, batches_per_worker=3, games_per_batch=4, search_length=20, timeout=600, pin=False):
+    # Learner plus actor processes on 127.0.0.1. The learner drains slowly against a one-slot queue
+    # (backpressure), restarts its server after the first batch (reconnects) and publishes new weights.
+    # With pin, a CoreScheduler splits the cores between actors and learner and rebalances from the queue.
+    torch.manual_seed(0)
+    mcts = MCTS(TicTacToeTransformerSeq())
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    # Actors are started before the learner listens, so they don't inherit its listening socket;
+    # they retry connecting until it is up
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    workers = [
+        context.Process(target=run_actor, args=("127.0.0.1", port, worker_id, batches_per_worker, games_per_batch, search_length, games_per_batch, pin))
+        for worker_id in range(num_workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    scheduler = None
+    if pin:
+        scheduler = CoreScheduler({"selfplay": num_workers, "learner": 1})
+        scheduler.register("learner")
+        for worker in workers:
+            scheduler.register("selfplay", worker.pid)
+
+    learner = Learner("127.0.0.1", port, max_pending_batches=1, retry_after=0.2)
+    learner.publish_weights(mcts)
+    learner.start()
+
+    expected_games = num_workers * batches_per_worker * games_per_batch
+    restarted = False
+    deadline = time.time() + timeout
+    while learner.games_received < expected_games and time.time() < deadline:
+        if scheduler is not None:
+            scheduler.rebalance("selfplay", "learner", learner.incoming.qsize(), learner.incoming.maxsize)
+        learner.drain(mcts)
+        if learner.batches_received > 0 and not restarted:
+            learner.stop()
+            time.sleep(0.5)
+            mcts.train_networks(num_epochs=1)
+            learner.publish_weights(mcts)
+            learner.start()
+            restarted = True
+        time.sleep(0.5)
+
+    learner.stopping = True
+    for worker in workers:
+        worker.join(timeout=30)
+    learner.stop()
+
+    print(f"games received: {learner.games_received}/{expected_games}, batches: {learner.batches_received}, "
+          f"connections: {learner.connections}, busy replies: {learner.busy_replies}, duplicates: {learner.duplicate_batches}, "
+          f"weight versions in records: {sorted(learner.versions_received)}")
+    if scheduler is not None:
+        print(f"core assignment: {scheduler.report()}, rebalances: {scheduler.rebalances}")
+    ok = learner.games_received == expected_games and learner.connections > num_workers
+    print("loopback OK" if ok else "loopback FAILED")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["learner", "actor", "loopback"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9876)
+    parser.add_argument("--worker-id", type=int, default=0)
+    parser.add_argument("--batches", type=int, default=1000000)
+    parser.add_argument("--games", type=int, default=8)
+    parser.add_argument("--search-length", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--games-per-round", type=int, default=100)
+    parser.add_argument("--pin", action="store_true", help="loopback: pin actors and learner to core sets")
+    args = parser.parse_args()
+
+    if args.command == "learner":
+        run_learner(args.host, args.port, args.rounds, args.games_per_round)
+    elif args.command == "actor":
+        run_actor(args.host, args.port, args.worker_id, args.batches, args.games, args.search_length)
+    else:
+        sys.exit(0 if loopback(args.workers, batches_per_worker=3, games_per_batch=args.games, search_length=args.search_length, pin=args.pin) else 1)
@@ -0,0 +1,75 @@
+import random
+
+# Early resignation for self-play. A player resigns once its search value has been at or below -threshold
+# for `consecutive_moves` of its own moves in a row. A playout_fraction of games never resign; they record
+# who would have resigned and whether that player really lost, which gives the false-resign rate.
+# With an exact oracle (e.g. solver.position_value) the result at the resign point is adjudicated instead
+# of scored as a loss, so value targets stay unbiased.
+
+def move_value(node):
+    # Value of the chosen move for the player making it, proven results take precedence
+    if node.proven is not None:
+        return node.proven
+    return node.value / node.visits if node.visits > 0 else 0
+
+class ResignGame:
+    def __init__(self, playout):
+        self.playout = playout
+        self.low_value_moves = {1: 0, 2: 0}
+        self.would_resign = None
+
+class Resignation:
+    def __init__(self, threshold=0.9, consecutive_moves=2, playout_fraction=0.1, oracle=None):
+        self.threshold = threshold
+        self.consecutive_moves = consecutive_moves
+        self.playout_fraction = playout_fraction
+        self.oracle = oracle  # oracle(state, player) -> exact value for the player to move
+
+        self.games = 0
+        self.resigned = 0
+        self.adjudicated = 0
+        self.moves_played = 0
+        self.calibration_games = 0
+        self.calibration_resigns = 0
+        self.false_resigns = 0
+
+    def new_game(self):
+        game = ResignGame(random.random() < self.playout_fraction)
+        self.games += 1
+        self.calibration_games += game.playout
+        return game
+
+    def check(self, game, state, player, value):
+        # Called after `player` searched `state`, with the value of its chosen move. Returns the winner
+        # (1, 2 or 0 for a draw, as Board.who_actually_wins) when the game ends here, None to play on
+        self.moves_played += 1
+        game.low_value_moves[player] = game.low_value_moves[player] + 1 if value <= -self.threshold else 0
+        if game.low_value_moves[player] < self.consecutive_moves:
+            return None
+
+        if game.playout:
+            if game.would_resign is None:
+                game.would_resign = player
+            return None
+
+        self.resigned += 1
+        if self.oracle is None:
+            return 3 - player
+        self.adjudicated += 1
+        result = self.oracle(state, player)
+        return 0 if result == 0 else (player if result == 1 else 3 - player)
+
+    def finish(self, game, winner):
+        if game.would_resign is not None:
+            self.calibration_resigns += 1
+            self.false_resigns += winner != 3 - game.would_resign
+
+    def report(self):
+        return {
+            "games": self.games,
+            "resigned": self.resigned,
+            "adjudicated": self.adjudicated,
+            "moves_per_game": self.moves_played / self.games if self.games else 0.0,
+            "calibration_games": self.calibration_games,
+            "false_resign_rate": self.false_resigns / self.calibration_resigns if self.calibration_resigns else 0.0,
+        }
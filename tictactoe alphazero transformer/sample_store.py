@@ -0,0 +1,124 @@
+import io
+import os
+import numpy as np
+from constants import DIMENSION
+
+# Bounded storage for MCTS.training_data. Only samples with a value target are kept (reward placeholders
+# are dropped on arrival), at most max_samples of them in memory. Beyond that the oldest shard_size samples
+# are written to a compressed .npz shard in spill_dir, or discarded when there is no spill_dir, and at most
+# max_shards shards stay on disk. Behaves like the list it replaces for appending, iteration and indexing.
+# MCTS.train_networks reads the spilled shards back (see spilled()); discarding prints a warning once.
+
+def encode_samples(samples):
+    # (state, policy or None, value) samples as compressed npz bytes; value-only samples get a NaN policy row
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        states=np.array([sample[0] for sample in samples], dtype=np.int8).reshape(-1, DIMENSION, DIMENSION),
+        policies=np.array([sample[1] if sample[1] is not None else [np.nan] * (DIMENSION * DIMENSION) for sample in samples], dtype=np.float32).reshape(-1, DIMENSION * DIMENSION),
+        values=np.array([sample[2] for sample in samples], dtype=np.float32),
+    )
+    return buffer.getvalue()
+
+def decode_samples(blob):
+    data = np.load(io.BytesIO(blob))
+    return [(state.astype(float), None if np.isnan(policy).any() else list(policy), float(value)) for state, policy, value in zip(data["states"], data["policies"], data["values"])]
+
+def is_shard_name(name):
+    # shard-<index>.npz, as written by SampleStore.spill; other files in spill_dir are left alone
+    return name.startswith("shard-") and name.endswith(".npz") and name[len("shard-"):-len(".npz")].isdigit()
+
+class SampleStore:
+    def __init__(self, max_samples=100000, spill_dir=None, shard_size=10000, max_shards=None, resume=True):
+        # resume: keep and train on shards an earlier run left in spill_dir, they are deleted otherwise
+        self.max_samples = max_samples
+        self.spill_dir = spill_dir
+        self.shard_size = min(shard_size, max_samples)
+        self.max_shards = max_shards
+        self.samples = []
+        self.shards = []  # Paths of spilled shards, oldest first
+        self.dropped_placeholders = 0
+        self.spilled_samples = 0
+        self.discarded_samples = 0
+        self.warned = False
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+            self.shards = sorted(os.path.join(spill_dir, name) for name in os.listdir(spill_dir) if is_shard_name(name))
+            if not resume:
+                for path in self.shards:
+                    os.remove(path)
+                self.shards = []
+
+    def append(self, sample):
+        if sample[2] is None:
+            self.dropped_placeholders += 1
+            return
+        self.samples.append(sample)
+        if len(self.samples) > self.max_samples:
+            self.spill()
+
+    def extend(self, samples):
+        for sample in samples:
+            self.append(sample)
+
+    def __iadd__(self, samples):
+        self.extend(samples)
+        return self
+
+    def spill(self):
+        oldest = self.samples[:self.shard_size]
+        del self.samples[:self.shard_size]
+        if self.spill_dir is None:
+            self.discard(len(oldest), "no spill_dir is set")
+            return
+
+        index = int(os.path.basename(self.shards[-1])[len("shard-"):-len(".npz")]) + 1 if self.shards else 0
+        path = os.path.join(self.spill_dir, f"shard-{index:06d}.npz")
+        with open(path, "wb") as file:
+            file.write(encode_samples(oldest))
+        self.shards.append(path)
+        self.spilled_samples += len(oldest)
+        if self.max_shards is not None:
+            while len(self.shards) > self.max_shards:
+                path = self.shards.pop(0)
+                self.discard(len(self.load_shard(path)), f"more than max_shards={self.max_shards} shards are on disk")
+                os.remove(path)
+
+    def discard(self, count, reason):
+        self.discarded_samples += count
+        if not self.warned:
+            print(f"Warning: SampleStore is discarding its oldest samples ({reason}), they will not be trained on")
+            self.warned = True
+
+    def load_shard(self, path):
+        with open(path, "rb") as file:
+            return decode_samples(file.read())
+
+    def spilled(self, max_shards=None):
+        # Spilled samples, newest shards first, for training on more than the in-memory window
+        for path in reversed(self.shards[-max_shards:] if max_shards else self.shards):
+            yield from self.load_shard(path)
+
+    def clear(self):
+        self.samples = []
+
+    def __len__(self):
+        return len(self.samples)
+
+    def __iter__(self):
+        return iter(self.samples)
+
+    def __getitem__(self, index):
+        return self.samples[index]
+
+    def __setitem__(self, index, sample):
+        self.samples[index] = sample
+
+    def stats(self):
+        return {
+            "samples_in_memory": len(self.samples),
+            "shards": len(self.shards),
+            "spilled_samples": self.spilled_samples,
+            "discarded_samples": self.discarded_samples,
+            "dropped_placeholders": self.dropped_placeholders,
+        }
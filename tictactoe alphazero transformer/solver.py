@@ -0,0 +1,53 @@
+from constants import DIMENSION
+from functools import lru_cache
+import random
+import numpy as np
+from mcts_code import Board
+
+board = Board()
+
+# Exact negamax over the full game tree, memoised on the flattened board.
+# Values are from the point of view of the player to move: 1 win, 0 draw, -1 loss.
+
+@lru_cache(maxsize=None)
+def _solve(cells, player):
+    state = np.array(cells, dtype=float).reshape((DIMENSION, DIMENSION))
+    if board.who_wins(state) != 2:
+        return board.outcome_for(state, player)
+
+    best_value = -1
+    for index, cell in enumerate(cells):
+        if cell != 0:
+            continue
+        next_cells = cells[:index] + (player,) + cells[index + 1:]
+        value = -_solve(next_cells, 3 - player)
+        if value > best_value:
+            best_value = value
+            if best_value == 1:
+                break
+    return best_value
+
+def position_value(state, player):
+    return _solve(tuple(int(cell) for cell in np.asarray(state).flatten()), player)
+
+def move_values(state, player):
+    # Exact value of every legal move for `player`
+    cells = tuple(int(cell) for cell in np.asarray(state).flatten())
+    values = {}
+    for index, cell in enumerate(cells):
+        if cell == 0:
+            next_cells = cells[:index] + (player,) + cells[index + 1:]
+            values[(index // DIMENSION, index % DIMENSION)] = -_solve(next_cells, 3 - player)
+    return values
+
+def best_moves(state, player):
+    values = move_values(state, player)
+    if not values:
+        return []
+    best_value = max(values.values())
+    return [move for move, value in values.items() if value == best_value]
+
+def solver_agent(state, player):
+    # Perfect play, random among equally good moves
+    moves = best_moves(state, player)
+    return random.choice(moves) if moves else None
@@ -0,0 +1,168 @@
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from collections import deque
+import numpy as np
+import torch
+from train import train_model
+from model import TicTacToeTransformerSeq
+from game_logic import generate_random_games
+from mcts_code import MCTS
+from arena import MCTSAgent, OPPONENTS, play_match
+
+# Hyperparameter sweep with successive halving. Every rung trains the surviving configurations up to
+# the rung's epoch budget in a process pool (resuming from their checkpoints), scores them headlessly
+# against the arena opponents and keeps the best 1/eta. The strength-vs-compute Pareto front is reported
+# and written to benchmarks/ (git-ignored) unless --output says otherwise.
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+
+SEARCH_SPACE = {
+    "batch_size": [16, 32, 64],
+    "learning_rate": [0.0001, 0.0003, 0.001, 0.003],
+    "search_length": [16, 32, 64],
+    "num_games": [2000, 5000],
+}
+
+def sample_configs(num_trials, seed=0):
+    generator = random.Random(seed)
+    configs = []
+    seen = set()
+    attempts = 0
+    while len(configs) < num_trials and attempts < num_trials * 20:
+        attempts += 1
+        config = {name: generator.choice(values) for name, values in SEARCH_SPACE.items()}
+        key = tuple(sorted(config.items()))
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+def rung_budgets(min_epochs, max_epochs, eta):
+    budgets = [max_epochs]
+    while budgets[0] / eta >= min_epochs:
+        budgets.insert(0, max(int(budgets[0] / eta), 1))
+    return budgets
+
+def run_trial(trial_id, config, epochs, checkpoint_dir, eval_games):
+    # Runs in a worker process: train up to `epochs` total, then evaluate. Output is kept quiet.
+    torch.set_num_threads(1)
+    random.seed(trial_id)
+    np.random.seed(trial_id)
+    checkpoint_path = os.path.join(checkpoint_dir, f"trial_{trial_id}.pth")
+
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        replay_buffer = deque(maxlen=config["num_games"] * 9)
+        generate_random_games(config["num_games"], replay_buffer)
+        cpu_start = time.process_time()  # Training cost only, the random games are regenerated every rung
+
+        model = TicTacToeTransformerSeq()
+        optimizer = torch.optim.Adam(model.parameters(), lr=config["learning_rate"])
+        epochs_done, train_cpu_seconds = 0, 0.0
+        if os.path.exists(checkpoint_path):
+            checkpoint = torch.load(checkpoint_path)
+            model.load_state_dict(checkpoint["model"])
+            optimizer.load_state_dict(checkpoint["optimizer"])
+            epochs_done, train_cpu_seconds = checkpoint["epochs"], checkpoint["train_cpu_seconds"]
+
+        train_model(model, replay_buffer, num_epochs=epochs - epochs_done, batch_size=config["batch_size"], optimizer=optimizer, verbose=False)
+        train_cpu_seconds += time.process_time() - cpu_start
+        torch.save({"model": model.state_dict(), "optimizer": optimizer.state_dict(), "epochs": epochs, "train_cpu_seconds": train_cpu_seconds}, checkpoint_path)
+
+        mcts = MCTS(model)
+        mcts.search_length = config["search_length"]
+        scores, eval_cpu_seconds, moves = {}, 0.0, 0
+        for opponent_name, opponent in OPPONENTS.items():
+            agent = MCTSAgent(mcts)
+            scores[opponent_name] = play_match(agent, opponent, eval_games)["score"]
+            eval_cpu_seconds += agent.cpu_seconds
+            moves += agent.moves
+
+    return {
+        "trial": trial_id,
+        "config": config,
+        "epochs": epochs,
+        "score": sum(scores.values()) / len(scores),
+        "scores": scores,
+        "train_cpu_seconds": train_cpu_seconds,
+        "cpu_seconds_per_move": eval_cpu_seconds / max(moves, 1),
+    }
+
+def pareto_front(results):
+    # Results no other result beats on both score (higher) and search cost per move (lower)
+    front = []
+    for result in results:
+        dominated = any(
+            other["score"] >= result["score"] and other["cpu_seconds_per_move"] <= result["cpu_seconds_per_move"]
+            and (other["score"] > result["score"] or other["cpu_seconds_per_move"] < result["cpu_seconds_per_move"])
+            for other in results
+        )
+        if not dominated:
+            front.append(result)
+    return sorted(front, key=lambda result: result["cpu_seconds_per_move"])
+
+def successive_halving(configs, min_epochs, max_epochs, eta, workers, eval_games, checkpoint_dir):
+    surviving = list(enumerate(configs))
+    history = []
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        for rung, epochs in enumerate(rung_budgets(min_epochs, max_epochs, eta)):
+            futures = [pool.submit(run_trial, trial_id, config, epochs, checkpoint_dir, eval_games) for trial_id, config in surviving]
+            results = [future.result() for future in concurrent.futures.as_completed(futures)]
+            results.sort(key=lambda result: result["score"], reverse=True)
+            history.append({"rung": rung, "epochs": epochs, "results": results})
+
+            print(f"\nRung {rung}: {len(results)} configs trained to {epochs} epochs")
+            for result in results:
+                print(f"  trial {result['trial']:>3} score={result['score']:.2f} "
+                      f"cpu/move={result['cpu_seconds_per_move']:.4f}s {result['config']}")
+
+            keep = max(1, math.ceil(len(results) / eta))
+            if epochs == max_epochs or len(results) == 1:
+                break
+            surviving = [(result["trial"], result["config"]) for result in results[:keep]]
+    return history
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trials", type=int, default=27)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--min-epochs", type=int, default=4)
+    parser.add_argument("--max-epochs", type=int, default=100)
+    parser.add_argument("--eval-games", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    configs = sample_configs(args.trials, args.seed)
+    with tempfile.TemporaryDirectory() as checkpoint_dir:
+        history = successive_halving(configs, args.min_epochs, args.max_epochs, args.eta, args.workers, args.eval_games, checkpoint_dir)
+
+    all_results = [result for rung in history for result in rung["results"]]
+    # Only the latest evaluation of each trial counts towards the front
+    latest = {}
+    for result in all_results:
+        latest[result["trial"]] = result
+    front = pareto_front(list(latest.values()))
+
+    print("\nPareto front (score vs. CPU seconds per move):")
+    for result in front:
+        print(f"  score={result['score']:.2f} cpu/move={result['cpu_seconds_per_move']:.4f}s "
+              f"epochs={result['epochs']} {result['config']}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"sweep_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"history": history, "pareto_front": front}, f, indent=2)
+    print(f"\nResults written to {output}")
@@ -0,0 +1,23 @@
+import numpy as np
+from constants import DIMENSION
+
+# The 8 symmetries of the square board as cell permutations, and the canonical form of a position under them.
+
+CELLS = DIMENSION * DIMENSION
+POWERS = 3 ** np.arange(CELLS, dtype=np.int64)
+
+def symmetry_permutations():
+    # transformed.flatten()[i] == state.flatten()[permutation[i]]
+    cells = np.arange(CELLS).reshape((DIMENSION, DIMENSION))
+    permutations = []
+    for flipped in [cells, np.fliplr(cells)]:
+        for turns in range(4):
+            permutations.append(np.rot90(flipped, turns).flatten())
+    return permutations
+
+SYMMETRIES = symmetry_permutations()
+
+def canonical_form(state):
+    # Smallest base-3 code over all symmetries, with the permutation producing it
+    flat = np.asarray(state, dtype=np.int64).flatten()
+    return min((int(np.dot(flat[permutation], POWERS)), tuple(permutation)) for permutation in SYMMETRIES)
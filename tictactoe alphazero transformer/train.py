@@ -1,8 +1,10 @@
 import torch
-import random
+import numpy as np
 from tqdm import tqdm
-from model import TicTacToeTransformerSeq, preprocess_experience
+from model import TicTacToeTransformerSeq
 from game_logic import generate_random_games
+from training_set import aggregate_experiences
+from batch_sampler import PrefetchSampler
 import torch.nn as nn
 
 num_epochs = 100
@@ -14,24 +16,47 @@ model = TicTacToeTransformerSeq()
 optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
 criterion = nn.CrossEntropyLoss()
 
-def train_model(model, replay_buffer, num_epochs=100, batch_size=32):
-    for epoch in tqdm(range(num_epochs), desc="Training"):
+def train_model(model, replay_buffer, num_epochs=100, batch_size=32, learning_rate=0.001, optimizer=None, verbose=True, deduplicate=True, prefetch=4, shard=None):
+    # The optimizer has to belong to the model being trained; pass one in to keep Adam state across calls
+    if optimizer is None:
+        optimizer = torch.optim.Adam(model.parameters(), lr=learning_rate)
+
+    # Batches come from the unique positions, each weighted by its number of duplicates in the buffer
+    if deduplicate:
+        training_set = aggregate_experiences(replay_buffer)
+    else:
+        training_set = []
+        for board, move, reward in replay_buffer:
+            target = np.zeros(DIMENSION * DIMENSION)
+            target[move[0]*DIMENSION + move[1]] = reward
+            training_set.append((board, target, 1))
+    if shard is not None:  # (rank, world_size): this data-parallel rank's share of the positions
+        rank, world_size = shard
+        training_set = training_set[rank::world_size]
+
+    # Batches are packed and sampled on a background thread, `prefetch` batches ahead of the optimizer
+    arrays = [
+        np.array([exp[0] for exp in training_set], dtype=np.int64),
+        np.array([exp[1] for exp in training_set], dtype=np.float32),
+        np.array([exp[2] for exp in training_set], dtype=np.float32),
+    ]
+    batches = iter(PrefetchSampler(arrays, batch_size, num_epochs * 10, prefetch))
+
+    for epoch in tqdm(range(num_epochs), desc="Training", disable=not verbose):
         for _ in range(10):
-            experiences = random.sample(replay_buffer, batch_size)  # Sample experiences from the replay buffer
-            inputs = preprocess_experience(experiences)
-            
-            actions = torch.tensor([exp[1][0]*DIMENSION + exp[1][1] for exp in experiences], dtype=torch.long)
-            rewards = torch.tensor([exp[2] for exp in experiences], dtype=torch.float)
+            inputs, targets, counts = next(batches)
             
             logits = model(inputs)
             
-            loss = -torch.mean(torch.log_softmax(logits, dim=-1).gather(1, actions.unsqueeze(1)).squeeze() * rewards)
+            # Count-weighted mean of reward * log p(move) over the raw samples behind the batch
+            loss = -torch.sum(counts * torch.sum(torch.log_softmax(logits, dim=-1) * targets, dim=1)) / torch.sum(counts)
             
             optimizer.zero_grad()
             loss.backward()
             optimizer.step()
             
         
-        print(f"Epoch {epoch+1}/{num_epochs}, Loss: {loss.item():.6f}")
+        if verbose:
+            print(f"Epoch {epoch+1}/{num_epochs}, Loss: {loss.item():.6f}")
     
     return model
@@ -0,0 +1,67 @@
+import numpy as np
+from constants import DIMENSION
+from symmetry import CELLS, POWERS, canonical_form
+
+# Position-deduplicated training sets. Self-play and random games repeat the same positions many times;
+# samples are grouped by canonical board (the 8 symmetries of the square) and their targets are averaged in
+# the canonical orientation. The networks are not symmetric and see raw boards at inference, so the averaged
+# target is mapped back onto every orientation of the position that actually occurred, and each of those
+# boards is trained on once, weighted by how often it occurred.
+
+def canonical_state(state, permutation):
+    return np.asarray(state).flatten()[list(permutation)].reshape((DIMENSION, DIMENSION))
+
+def oriented_target(canonical_target, permutation):
+    # Inverse of canonical_state for a per-cell target: cell permutation[i] of the board gets canonical cell i
+    target = np.zeros(CELLS)
+    target[list(permutation)] = canonical_target
+    return target
+
+def group_orientations(items):
+    # items (state, ...) grouped by canonical code, then by the board actually seen:
+    # {canonical code: {board code: (state, permutation to canonical, items)}}
+    groups = {}
+    for item in items:
+        state = item[0]
+        code, permutation = canonical_form(state)
+        orientation_code = int(np.dot(np.asarray(state, dtype=np.int64).flatten(), POWERS))
+        orientations = groups.setdefault(code, {})
+        if orientation_code not in orientations:
+            orientations[orientation_code] = (state, permutation, [])
+        orientations[orientation_code][2].append(item)
+    return groups
+
+def aggregate_samples(samples):
+    # MCTS samples (state, policy or None, value) -> (state, mean policy or None, mean value, value count, policy count),
+    # one row per board that occurred; the means are over all symmetric duplicates of the position
+    rows = []
+    for orientations in group_orientations(samples).values():
+        policy_sum, value_sum, value_count, policy_count = np.zeros(CELLS), 0.0, 0, 0
+        for state, permutation, items in orientations.values():
+            for _, policy, value in items:
+                value_sum += value
+                value_count += 1
+                if policy is not None:
+                    policy_sum += np.asarray(policy)[list(permutation)]
+                    policy_count += 1
+
+        for state, permutation, items in orientations.values():
+            policies_here = sum(1 for item in items if item[1] is not None)
+            policy = list(oriented_target(policy_sum / policy_count, permutation)) if policies_here else None
+            rows.append((state, policy, value_sum / value_count, len(items), policies_here))
+    return rows
+
+def aggregate_experiences(experiences):
+    # Replay buffer experiences (board, move, reward) -> (board, mean reward-weighted move target, count), one row per
+    # board that occurred. The mean over a position's duplicates of reward * log p(move) equals target . log p
+    rows = []
+    for orientations in group_orientations(experiences).values():
+        target_sum, count = np.zeros(CELLS), 0
+        for state, permutation, items in orientations.values():
+            for _, move, reward in items:
+                target_sum[list(permutation).index(move[0] * DIMENSION + move[1])] += reward
+                count += 1
+
+        for state, permutation, items in orientations.values():
+            rows.append((state, oriented_target(target_sum / count, permutation), len(items)))
+    return rows